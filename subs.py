@@ -2,15 +2,59 @@ import os
 import subprocess
 import sys
 import platform
+import shutil
+import tempfile
+import json
+import argparse
+import time
+import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 
 system_info = platform.system()
 
 if system_info == 'Windows':
     mkvmerge = "C:\\Program Files\\MKVToolNix\\mkvmerge.exe"
+    mkvpropedit = "C:\\Program Files\\MKVToolNix\\mkvpropedit.exe"
 elif system_info == 'Linux':
     mkvmerge = "/usr/bin/mkvmerge"
+    mkvpropedit = "/usr/bin/mkvpropedit"
 else: #unixlike
     mkvmerge = "/usr/bin/mkvmerge"
+    mkvpropedit = "/usr/bin/mkvpropedit"
+
+ffprobe = shutil.which("ffprobe")
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv")
+SUB_EXTENSIONS = (".ass", ".srt", ".ssa")
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+# subcarpetas con las fuentes de los .ass (se comparan en minusculas)
+FONT_DIRS = ("fonts", "attachments")
+
+# etiqueta de idioma -> (codigo ISO 639-2 para mkvmerge, nombre de la pista)
+LANGUAGES = {
+    "es": ("spa", "Spanish"), "spa": ("spa", "Spanish"),
+    "en": ("eng", "English"), "eng": ("eng", "English"),
+    "pt": ("por", "Portuguese"), "por": ("por", "Portuguese"),
+    "fr": ("fre", "French"), "fre": ("fre", "French"), "fra": ("fre", "French"),
+    "de": ("ger", "German"), "ger": ("ger", "German"), "deu": ("ger", "German"),
+    "it": ("ita", "Italian"), "ita": ("ita", "Italian"),
+    "ca": ("cat", "Catalan"), "cat": ("cat", "Catalan"),
+    "ja": ("jpn", "Japanese"), "jpn": ("jpn", "Japanese"),
+    "ko": ("kor", "Korean"), "kor": ("kor", "Korean"),
+    "zh": ("chi", "Chinese"), "chi": ("chi", "Chinese"), "zho": ("chi", "Chinese"),
+    "ru": ("rus", "Russian"), "rus": ("rus", "Russian"),
+}
+# subtitulos <stem>.<ext> sin idioma: se mantienen como pista en espanol
+DEFAULT_LANGUAGE = "spa"
+
+# cache de mkvmerge -J por carpeta, invalidada por tamaño y mtime
+IDENTIFY_CACHE = ".mkvmerge-cache.json"
+
+# margen sobre el tamaño de entrada para la cabecera/indices del contenedor
+SPACE_MARGIN = 1.05
+
+HASH_BLOCK = 8 * 1024 * 1024
 
 
 def create_output_directory(directory):
@@ -18,28 +62,471 @@ def create_output_directory(directory):
         os.mkdir(os.path.join(directory, "Output"))
 
 
-def process_files(directory):
-    files = [file for file in os.listdir(directory) if file.endswith(".mp4") or file.endswith(".mkv")]
+def required_space(*paths):
+    """Bytes necesarios para escribir la salida de un mux con estas entradas"""
+    return int(sum(os.path.getsize(p) for p in paths) * SPACE_MARGIN)
+
+
+def has_free_space(directory, needed):
+    return shutil.disk_usage(directory).free >= needed
+
+
+def identify(file):
+    """Devuelve la identificacion JSON de mkvmerge (-J) o None si falla"""
+    try:
+        result = subprocess.run([mkvmerge, "-J", file], capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def subtitle_tracks(info):
+    if not info:
+        return []
+    return [t for t in info.get("tracks", []) if t.get("type") == "subtitles"]
+
+
+def load_identify_cache(directory):
+    try:
+        with open(os.path.join(directory, IDENTIFY_CACHE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_identify_cache(directory, cache):
+    fd, tmp_file = tempfile.mkstemp(prefix=".cache-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, os.path.join(directory, IDENTIFY_CACHE))
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def cached_identify(cache, directory, file):
+    """identify() reutilizando el resultado mientras el archivo no cambie"""
+    st = os.stat(file)
+    key = os.path.relpath(file, directory)
+    cached = cache.get(key)
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        return cached["info"]
+    info = identify(file)
+    if info is not None:
+        cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "info": info}
+    return info
+
+
+def parse_language(tag):
+    """(codigo ISO 639-2, nombre) para etiquetas como 'es', 'eng' o 'es-419'; None si no es un idioma"""
+    base, _, region = tag.partition("-")
+    language = LANGUAGES.get(base.lower())
+    if language is None or (region and not region.isalnum()):
+        return None
+    code, name = language
+    return code, f"{name} ({region})" if region else name
+
+
+def track_language(track):
+    """Codigo ISO 639-2 de una pista de la identificacion de mkvmerge"""
+    properties = track.get("properties", {})
+    tag = properties.get("language_ietf") or properties.get("language") or "und"
+    language = parse_language(tag)
+    return language[0] if language else tag
+
+
+def sidecar_track(path, stem=None):
+    """Pista a mezclar desde <stem>.<idioma>.<ext>; sin idioma reconocible se asume DEFAULT_LANGUAGE"""
+    name, ext = os.path.splitext(os.path.basename(path))
+    if stem is None:
+        tag = os.path.splitext(name)[1][1:]
+    else:
+        # La etiqueta es lo que sigue al nombre del video: Foo.it.srt junto a Foo.it.mkv no lleva idioma
+        tag = name[len(stem) + 1:] if name.startswith(stem + ".") else ""
+    code, track_name = parse_language(tag) or parse_language(DEFAULT_LANGUAGE)
+    return {"path": path, "language": code, "name": track_name}
+
+
+class MuxError(Exception):
+    pass
+
+
+def run_tool(cmd):
+    """Ejecuta mkvmerge/mkvpropedit; devuelve (codigo, ultima linea de la salida)"""
+    result = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    lines = (result.stdout + result.stderr).strip().splitlines()
+    return result.returncode, lines[-1] if lines else ""
+
+
+def mux(input_file, tracks, output_file, fonts=()):
+    """Mezcla todas las pistas (y fuentes) en una sola pasada sobre un temporal del mismo
+    sistema de archivos y lo renombra al final.
+
+    Devuelve los bytes escritos; lanza MuxError con el mensaje de mkvmerge si falla.
+    """
+    output_dir = os.path.dirname(output_file)
+    fd, tmp_file = tempfile.mkstemp(prefix=".mux-", suffix=".mkv", dir=output_dir)
+    os.close(fd)
+    cmd = [mkvmerge, "-o", tmp_file, input_file]
+    for track in tracks:
+        cmd += ["--track-name", f"0:{track['name']}", "--language", f"0:{track['language']}", track["path"]]
+    for font in fonts:
+        cmd += ["--attach-file", font]
+    try:
+        returncode, message = run_tool(cmd)
+        # mkvmerge: 0 = ok, 1 = avisos, 2 = error
+        if returncode not in (0, 1):
+            raise MuxError(message or f"mkvmerge termino con codigo {returncode}")
+        # mkstemp crea el archivo con 0600; heredar los permisos del original
+        shutil.copymode(input_file, tmp_file)
+        os.replace(tmp_file, output_file)
+        return os.path.getsize(output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def file_checksum(file):
+    """BLAKE2b del archivo leido con mmap por bloques (hashlib suelta el GIL al hashear).
+
+    ytdlp-tool.py usa esta misma funcion para verificar y deduplicar descargas.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, HASH_BLOCK):
+                        digest.update(view[offset:offset + HASH_BLOCK])
+                finally:
+                    view.release()
+    return "blake2b:" + digest.hexdigest()
+
+
+def probe_media(file, ffprobe_path=None):
+    """Duracion y tipos de pista segun ffprobe; lanza RuntimeError con el motivo si no puede leerlo"""
+    result = subprocess.run(
+        [ffprobe_path or ffprobe, "-v", "error", "-show_entries", "format=duration:stream=codec_type",
+         "-of", "json", file],
+        capture_output=True, text=True, timeout=120)
+    try:
+        info = json.loads(result.stdout or "{}")
+    except ValueError:
+        info = {}
+    streams = [s.get("codec_type") for s in info.get("streams", [])]
+    try:
+        duration = float(info.get("format", {}).get("duration", 0))
+    except (TypeError, ValueError):
+        duration = 0
+    if result.returncode != 0 or not streams:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(f"ffprobe no puede leerlo: {lines[-1] if lines else 'sin pistas'}")
+    if duration <= 0:
+        raise RuntimeError("duracion nula")
+    return duration, streams
+
+
+def verify_output(file):
+    """Comprueba con ffprobe que el resultado tiene duracion, video y subtitulos; devuelve su hash.
+
+    Devuelve (ok, checksum o motivo del fallo).
+    """
+    if ffprobe:
+        try:
+            streams = probe_media(file)[1]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            return False, str(e)
+        if "video" not in streams or "subtitle" not in streams:
+            return False, f"pistas inesperadas: {streams}"
+    return True, file_checksum(file)
+
+
+def edit_in_place(input_file, edits=None):
+    """Ajusta nombre/idioma de las pistas de subtitulos ya presentes sin reescribir el video.
+
+    edits: [{"track": n, "language": ..., "name": ...}] sobre la n-esima pista de subtitulos;
+    por defecto la primera pasa a Spanish/spa.
+    """
+    edits = edits or [{"track": 1, "language": "spa", "name": "Spanish"}]
+    cmd = [mkvpropedit, input_file]
+    for edit in edits:
+        cmd += ["--edit", f"track:s{edit['track']}",
+                "--set", f"name={edit['name']}", "--set", f"language={edit['language']}"]
+    returncode, message = run_tool(cmd)
+    if returncode != 0:
+        raise MuxError(message or f"mkvpropedit termino con codigo {returncode}")
+
+
+def index_directory(directory):
+    """Un solo listado de la carpeta: videos, subtitulos por stem y fuentes para adjuntar"""
+    videos, sidecars, fonts = [], {}, []
+    for file in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file)
+        if file.endswith(VIDEO_EXTENSIONS):
+            videos.append(file)
+        elif file.endswith(SUB_EXTENSIONS):
+            stem = os.path.splitext(file)[0]
+            sidecars.setdefault(stem, []).append(file)
+            # <stem>.<idioma>.<ext> tambien pertenece al video <stem>
+            base, tag = os.path.splitext(stem)
+            if base and parse_language(tag[1:]):
+                sidecars.setdefault(base, []).append(file)
+        elif file.lower().endswith(FONT_EXTENSIONS):
+            fonts.append(path)
+        elif file.lower() in FONT_DIRS and os.path.isdir(path):
+            fonts.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if f.lower().endswith(FONT_EXTENSIONS))
+    return videos, sidecars, fonts
+
+
+def select_tracks(directory, stem, candidates):
+    """Un subtitulo por idioma (preferencia .ass > .srt > .ssa); devuelve (pistas, avisos)"""
+    by_language = {}
+    for file in sorted(candidates, key=lambda f: SUB_EXTENSIONS.index(os.path.splitext(f)[1])):
+        track = sidecar_track(os.path.join(directory, file), stem)
+        by_language.setdefault(track["language"], []).append(track)
+    tracks, warnings = [], []
+    for language, options in by_language.items():
+        tracks.append(options[0])
+        if len(options) > 1:
+            names = ", ".join(os.path.basename(t["path"]) for t in options)
+            warnings.append(f"varios subtitulos {language} ({names}), se usa {os.path.basename(options[0]['path'])}")
+    # el idioma por defecto va primero, como la unica pista de antes
+    tracks.sort(key=lambda t: t["language"] != DEFAULT_LANGUAGE)
+    return tracks, warnings
+
+
+def in_place_edits(info, tracks):
+    """Asigna las pistas de subtitulos existentes a los idiomas de los sidecars.
+
+    Primero por idioma; las pistas 'und' reciben en orden los idiomas que falten.
+    Devuelve (ediciones, pistas sin hueco en el archivo).
+    """
+    edits, pending, undetermined = [], list(tracks), []
+    for number, existing in enumerate(subtitle_tracks(info), 1):
+        language = track_language(existing)
+        match = next((t for t in pending if t["language"] == language), None)
+        if match:
+            pending.remove(match)
+            edits.append((number, match))
+        elif language == "und":
+            undetermined.append(number)
+    edits.extend(zip(undetermined, pending))
+    edits = [{"track": number, "language": t["language"], "name": t["name"]} for number, t in edits]
+    return edits, pending[len(undetermined):]
+
+
+def plan_file(directory, file, output_dir, sidecars, fonts, cache, in_place=False):
+    """Operacion prevista para un video, sin ejecutar nada"""
+    stem = os.path.splitext(file)[0]
+    input_file = os.path.join(directory, file)
+    # mkvmerge siempre escribe Matroska
+    output_file = os.path.join(output_dir, f"{stem}.mkv")
+    op = {"file": file, "input": input_file, "output": output_file, "tracks": [], "fonts": [], "edits": [],
+          "action": "omitir", "reason": None, "warnings": [], "read_bytes": 0, "write_bytes": 0}
+
+    tracks, op["warnings"] = select_tracks(directory, stem, sidecars.get(stem, []))
+    if not tracks:
+        op["reason"] = "sin subtitulo"
+        return op
+    info = cached_identify(cache, directory, input_file) or {}
+
+    # Si el mkv ya lleva pistas, basta con editar metadatos en sitio
+    if in_place and file.endswith(".mkv") and os.path.exists(mkvpropedit) and subtitle_tracks(info):
+        op["edits"], missing = in_place_edits(info, tracks)
+        if op["edits"]:
+            op.update(action="en sitio", output=input_file, tracks=[t for t in tracks if t not in missing])
+            op["warnings"] += [f"{t['language']}: no hay pista que editar, haria falta un mux" for t in missing]
+            return op
+
+    # No duplicar pistas: las del propio video y las de una salida de una ejecucion anterior
+    present = {track_language(t) for t in subtitle_tracks(info)}
+    if os.path.exists(output_file) and os.path.abspath(output_file) != os.path.abspath(input_file):
+        done = {track_language(t) for t in subtitle_tracks(cached_identify(cache, directory, output_file))}
+        if all(t["language"] in present | done for t in tracks):
+            op["reason"] = "ya procesado"
+            return op
+    op["tracks"] = [t for t in tracks if t["language"] not in present]
+    op["warnings"] += [f"{t['language']}: la pista ya existe, se omite" for t in tracks if t["language"] in present]
+    if not op["tracks"]:
+        op["reason"] = "pistas ya presentes"
+        return op
+
+    # Las fuentes solo hacen falta para .ass/.ssa; las ya adjuntas no se repiten
+    if any(t["path"].endswith((".ass", ".ssa")) for t in op["tracks"]):
+        attached = {a.get("file_name") for a in info.get("attachments", [])}
+        op["fonts"] = [f for f in fonts if os.path.basename(f) not in attached]
+
+    inputs = [input_file] + [t["path"] for t in op["tracks"]] + op["fonts"]
+    op["action"] = "mux"
+    op["read_bytes"] = sum(os.path.getsize(p) for p in inputs)
+    op["write_bytes"] = required_space(*inputs)
+    return op
+
+
+def build_plan(directory, in_place=False, save_cache=False):
+    """Plan de la carpeta; la cache de mkvmerge -J solo se escribe si se pide (al ejecutar)"""
+    videos, sidecars, fonts = index_directory(directory)
+    output_dir = os.path.join(directory, "Output")
+    cache = load_identify_cache(directory)
+    previous = dict(cache)
+    operations = [plan_file(directory, file, output_dir, sidecars, fonts, cache, in_place) for file in videos]
+    # A.mp4 y A.mkv darian la misma salida: solo la primera se procesa
+    outputs = {}
+    for op in operations:
+        if op["action"] != "mux":
+            continue
+        first = outputs.setdefault(os.path.normcase(op["output"]), op["file"])
+        if first != op["file"]:
+            op.update(action="omitir", reason=f"misma salida que {first}", tracks=[], fonts=[],
+                      read_bytes=0, write_bytes=0)
+    if save_cache and cache != previous:
+        save_identify_cache(directory, cache)
+    return {
+        "directory": directory,
+        "operations": operations,
+        "totals": {
+            "files": len(operations),
+            "mux": sum(op["action"] == "mux" for op in operations),
+            "in_place": sum(op["action"] == "en sitio" for op in operations),
+            "skipped": sum(op["action"] == "omitir" for op in operations),
+            "read_bytes": sum(op["read_bytes"] for op in operations),
+            "write_bytes": sum(op["write_bytes"] for op in operations),
+        },
+    }
+
+
+def print_plan(plan):
+    for op in plan["operations"]:
+        detail = op["reason"] or ", ".join(
+            f"{os.path.basename(t['path'])} ({t['language']})" for t in op["tracks"])
+        if op["fonts"]:
+            detail += f" + {len(op['fonts'])} fuentes"
+        print(f"[{op['action']}] {op['file']}: {detail}"
+              + (f" ({op['write_bytes']} bytes a escribir)" if op["write_bytes"] else ""))
+        for warning in op["warnings"]:
+            print(f"    aviso: {warning}")
+    totals = plan["totals"]
+    print(f"\n{totals['mux']} mux, {totals['in_place']} en sitio, {totals['skipped']} omitidos; "
+          f"E/S estimada: {totals['read_bytes']} bytes leidos, {totals['write_bytes']} escritos")
+
+
+def run_operation(op, out=None):
+    """Ejecuta una operacion del plan y devuelve su resultado con tiempos.
+
+    El progreso se escribe en out (stderr cuando stdout lleva el informe JSON).
+    """
+    entry = {"file": op["file"], "output": None, "mode": op["action"], "bytes_written": 0,
+             "ok": False, "error": op["reason"], "seconds": 0.0}
+    if op["action"] == "omitir":
+        print(f"[omitido] {op['file']}: {op['reason']}", file=out)
+        return entry
+
+    start = time.perf_counter()
+    try:
+        if op["action"] == "en sitio":
+            edit_in_place(op["input"], op["edits"])
+        else:
+            # el espacio se comprueba al ejecutar: los mux anteriores ya lo han consumido
+            output_dir = os.path.dirname(op["output"])
+            if not has_free_space(output_dir, op["write_bytes"]):
+                raise MuxError(f"se necesitan {op['write_bytes']} bytes libres en {output_dir}")
+            entry["bytes_written"] = mux(op["input"], op["tracks"], op["output"], op["fonts"])
+        entry["output"] = op["output"]
+        entry["ok"] = True
+        entry["error"] = None
+    except (MuxError, OSError) as e:
+        entry["error"] = str(e)
+    entry["seconds"] = time.perf_counter() - start
+
+    if entry["ok"]:
+        rate = entry["bytes_written"] / entry["seconds"] / 1024 ** 2 if entry["seconds"] else 0
+        print(f"[ok] {op['file']}: {entry['bytes_written']} bytes en {entry['seconds']:.1f} s ({rate:.1f} MiB/s)", file=out)
+    else:
+        print(f"[error] {op['file']}: {entry['error']}", file=out)
+    return entry
+
+
+def execute_plan(plan, verify=False, out=None):
+    """Ejecuta el plan y devuelve el informe: resultados por archivo y totales"""
+    start = time.perf_counter()
+    # la verificacion (ffprobe + hash) de un archivo se solapa con el mux del siguiente
+    with ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2)) as pool:
+        results = []
+        for op in plan["operations"]:
+            entry = run_operation(op, out)
+            if verify and entry["ok"]:
+                entry["verify"] = pool.submit(verify_output, entry["output"])
+            results.append(entry)
+        for entry in results:
+            if "verify" in entry:
+                verified, detail = entry.pop("verify").result()
+                entry["verified"] = verified
+                if verified:
+                    entry["checksum"] = detail
+                else:
+                    entry["ok"] = False
+                    entry["error"] = detail
+                    print(f"[corrupto] {entry['file']}: {detail}", file=out)
+    elapsed = time.perf_counter() - start
+    written = sum(r["bytes_written"] for r in results)
+    return {
+        "directory": plan["directory"],
+        "results": results,
+        "totals": {
+            "files": len(results),
+            "ok": sum(r["ok"] for r in results),
+            "failed": sum(1 for r in results if not r["ok"] and r["mode"] != "omitir"),
+            "bytes_written": written,
+            "seconds": elapsed,
+            "mib_per_s": written / elapsed / 1024 ** 2 if elapsed else 0,
+        },
+    }
+
+
+def process_files(directory, in_place=False, verify=False):
+    return execute_plan(build_plan(directory, in_place, save_cache=True), verify)["results"]
 
-    for file in files:
-        input_file = os.path.join(directory, file)
-        output_file = os.path.join(os.path.join(directory, "Output"), file)
-        ass_file = os.path.join(directory, f"{os.path.splitext(file)[0]}.ass")
-        srt_file = os.path.join(directory, f"{os.path.splitext(file)[0]}.srt")
-        ssa_file = os.path.join(directory, f"{os.path.splitext(file)[0]}.ssa")
 
-        subprocess.run(
-            [mkvmerge, "-o", output_file, input_file, "--track-name", "0:Spanish", "--language", "0:spa", ass_file])
-        subprocess.run(
-            [mkvmerge, "-o", output_file, input_file, "--track-name", "0:Spanish", "--language", "0:spa", srt_file])
-        subprocess.run(
-            [mkvmerge, "-o", output_file, input_file, "--track-name", "0:Spanish", "--language", "0:spa", ssa_file])
-        
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrega subtitulos a los videos de una carpeta")
+    parser.add_argument("directory", nargs="?", help="carpeta con los videos y subtitulos")
+    parser.add_argument("--in-place", action="store_true",
+                        help="editar con mkvpropedit los mkv que ya tienen la pista en vez de reescribirlos")
+    parser.add_argument("--verify", action="store_true",
+                        help="comprobar cada resultado con ffprobe y calcular su hash BLAKE2")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="mostrar el plan (operaciones y E/S estimada) sin ejecutar nada")
+    parser.add_argument("--json", action="store_true",
+                        help="emitir el plan (con --dry-run) o el informe final en JSON")
+    args = parser.parse_args()
+
+    input_directory = args.directory or input("introduzca el path:")
+    plan = build_plan(input_directory, in_place=args.in_place, save_cache=not args.dry_run)
+
+    if args.dry_run:
+        if args.json:
+            print(json.dumps(plan, indent=2))
+        else:
+            print_plan(plan)
+        sys.exit(0)
 
-    input_directory = input("introduzca el path:")
     create_output_directory(input_directory)
-    process_files(input_directory)
+    report = execute_plan(plan, verify=args.verify, out=sys.stderr if args.json else sys.stdout)
+    totals = report["totals"]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if totals["failed"] else 0)
 
+    print(f"\n{totals['ok']}/{totals['files']} archivos, {totals['bytes_written']} bytes escritos "
+          f"en {totals['seconds']:.1f} s ({totals['mib_per_s']:.1f} MiB/s)")
     print("\n============================ :)")
     input("Hecho. Presiona cualquier tecla para salir.")
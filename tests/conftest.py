@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def yt():
+    """ytdlp-tool.py como módulo (el guion del nombre impide importarlo directamente)"""
+    spec = importlib.util.spec_from_file_location("ytdlp_tool", os.path.join(ROOT, "ytdlp-tool.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+import subs
+
+
+@pytest.fixture
+def no_mkvmerge(monkeypatch):
+    """Sin MKVToolNix: los archivos no llevan pistas y no hay mkvpropedit"""
+    monkeypatch.setattr(subs, "identify", lambda file: None)
+    monkeypatch.setattr(subs, "mkvpropedit", "/nonexistent/mkvpropedit")
+
+
+def touch(directory, *names):
+    for name in names:
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(b"\0" * 10)
+
+
+def test_sidecar_track_language_from_tag():
+    track = subs.sidecar_track("/x/Video.en.srt", "Video")
+    assert (track["language"], track["name"]) == ("eng", "English")
+    assert subs.sidecar_track("/x/Video.es-419.ass", "Video")["name"] == "Spanish (419)"
+
+
+def test_sidecar_track_untagged_uses_default_language():
+    assert subs.sidecar_track("/x/Video.srt", "Video")["language"] == subs.DEFAULT_LANGUAGE
+    # El ".it" es parte del nombre del video, no una etiqueta de idioma
+    assert subs.sidecar_track("/x/Foo.it.srt", "Foo.it")["language"] == subs.DEFAULT_LANGUAGE
+    assert subs.sidecar_track("/x/Foo.it.fr.srt", "Foo.it")["language"] == "fre"
+
+
+def test_sidecar_track_without_stem_reads_inner_extension():
+    assert subs.sidecar_track("/x/Video.pt.srt")["language"] == "por"
+
+
+def test_plan_file_muxes_sidecars(tmp_path, no_mkvmerge):
+    touch(tmp_path, "Video.mp4", "Video.srt", "Video.en.ass", "Video.en.srt")
+    _, sidecars, fonts = subs.index_directory(str(tmp_path))
+    op = subs.plan_file(str(tmp_path), "Video.mp4", str(tmp_path / "Output"), sidecars, fonts, {})
+    assert op["action"] == "mux"
+    assert op["output"] == str(tmp_path / "Output" / "Video.mkv")
+    assert [os.path.basename(t["path"]) for t in op["tracks"]] == ["Video.srt", "Video.en.ass"]
+    assert op["warnings"]
+    assert op["write_bytes"] == subs.required_space(*(str(tmp_path / n) for n in ("Video.mp4", "Video.srt", "Video.en.ass")))
+
+
+def test_plan_file_without_sidecar_is_skipped(tmp_path, no_mkvmerge):
+    touch(tmp_path, "Solo.mkv")
+    _, sidecars, fonts = subs.index_directory(str(tmp_path))
+    op = subs.plan_file(str(tmp_path), "Solo.mkv", str(tmp_path / "Output"), sidecars, fonts, {})
+    assert (op["action"], op["reason"]) == ("omitir", "sin subtitulo")
+
+
+def test_build_plan_skips_inputs_with_the_same_output(tmp_path, no_mkvmerge):
+    touch(tmp_path, "A.mkv", "A.mp4", "A.srt")
+    plan = subs.build_plan(str(tmp_path))
+    actions = {op["file"]: op["action"] for op in plan["operations"]}
+    assert actions == {"A.mkv": "mux", "A.mp4": "omitir"}
+    assert plan["totals"]["mux"] == 1
+    assert not os.path.exists(tmp_path / subs.IDENTIFY_CACHE)
@@ -0,0 +1,113 @@
+import gzip
+import os
+
+import pytest
+
+
+def read_lines(yt, tmp_path, data, **kwargs):
+    path = tmp_path / "salida"
+    path.write_bytes(data)
+    with open(path, "rb") as stream:
+        return list(yt.iter_lines(stream, **kwargs))
+
+
+def test_iter_lines_splits_across_chunks(yt, tmp_path):
+    data = b"[download] uno\n\n  dos  \r\ntres sin salto"
+    assert read_lines(yt, tmp_path, data, chunk_size=4) == ["[download] uno", "dos", "tres sin salto"]
+
+
+def test_iter_lines_truncates_long_lines(yt, tmp_path):
+    data = b"x" * 50 + b"\ncorta\n"
+    assert read_lines(yt, tmp_path, data, chunk_size=8, max_line=10) == ["x" * 10, "corta"]
+
+
+def test_iter_lines_replaces_invalid_utf8(yt, tmp_path):
+    assert read_lines(yt, tmp_path, b"caf\xe9\n") == ["caf�"]
+
+
+def test_claim_suffixes_names_taken_by_other_jobs(yt, tmp_path):
+    index = yt.OutputPathIndex()
+    assert index.claim("a", tmp_path, "Video") == "Video"
+    assert index.claim("b", tmp_path, "Video") == "Video (2)"
+    # Un reintento del mismo trabajo conserva su nombre
+    assert index.claim("a", tmp_path, "Video") == "Video"
+
+
+def test_claim_respects_finished_files_only(yt, tmp_path):
+    for name in ("Hecho.mkv", "Parcial.f137.mp4.part", "Parcial.mp4.ytdl", "Ab.c.mp4"):
+        (tmp_path / name).touch()
+    index = yt.OutputPathIndex()
+    assert index.claim("a", tmp_path, "Hecho") == "Hecho (2)"
+    # Los restos de una descarga a medias se continúan, no ocupan el nombre
+    assert index.claim("b", tmp_path, "Parcial") == "Parcial"
+    assert index.claim("c", tmp_path, "Ab") == "Ab"
+
+
+def test_queue_stats_counts_each_byte_once(yt):
+    stats = yt.QueueStats()
+    stats.expect("a", 1000)
+    stats.new_file("a", "V.mp4")
+    counted = sum(stats.progress("a", n) for n in (0, 200, 500))
+    # El reintento anuncia el mismo destino y continúa el .part
+    stats.new_file("a", "V.mp4")
+    counted += sum(stats.progress("a", n) for n in (500, 400, 1000))
+    assert counted == 1000
+    assert stats.expected["a"] == [1000, 1000]
+
+
+def test_queue_stats_resumed_bytes_are_not_throughput(yt):
+    stats = yt.QueueStats()
+    stats.expect("a", 1000)
+    stats.new_file("a", "V.mp4")
+    assert stats.progress("a", 600) == 0
+    assert stats.progress("a", 700) == 100
+    assert stats.expected["a"] == [1000, 700]
+    stats.new_file("a", "A.m4a")
+    assert stats.progress("a", 0) == 0
+    assert stats.progress("a", 50) == 50
+
+
+RECORDS = [
+    {"url": f"https://example.com/v/{n}", "custom_name": "Predeterminado",
+     "resolution": "1080p" if n % 2 else "720p", "status": "En cola"}
+    for n in range(5)
+] + [{"url": "https://example.com/hecho", "custom_name": "Ñandú", "resolution": "720p",
+      "status": "Completado", "path": "/tmp/Ñandú.mkv", "size": 123, "checksum": "blake2b:00"}]
+
+
+@pytest.mark.parametrize("name", ["cola.ndjson", "cola.jsonl.gz", "cola.columns.json.gz", "cola.json"])
+def test_queue_export_import_roundtrip(yt, tmp_path, name):
+    path = tmp_path / name
+    yt.write_queue_records(path, RECORDS)
+    loaded = [{k: v for k, v in record.items() if v is not None} for record in yt.iter_queue_records(path)]
+    assert loaded == RECORDS
+
+
+def test_queue_export_compresses_gz(yt, tmp_path):
+    path = tmp_path / "cola.ndjson.gz"
+    yt.write_queue_records(path, RECORDS)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == len(RECORDS)
+
+
+def test_compile_format_profile_height_ladder(yt):
+    compiled = yt.compile_format_profile({"height": 720})
+    selector = compiled["args"][1]
+    assert selector.startswith("bv[height=720]+ba")
+    assert "[height=480]" not in selector
+    assert selector.endswith("/b")
+    assert compiled["split_args"][1].endswith(",ba")
+    assert not compiled["audio_only"]
+
+
+def test_compile_format_profile_audio_only_keeps_codec(yt):
+    compiled = yt.compile_format_profile({"audio_only": True, "container": "mp4"})
+    assert compiled["args"] == ["-f", "ba[ext=m4a]/ba", "-x"]
+    assert compiled["split_ffmpeg"] == "extract"
+    assert compiled["audio_only"]
+
+
+def test_compile_format_profile_container_and_limits(yt):
+    compiled = yt.compile_format_profile({"height": 1080, "container": "mp4", "max_filesize": "500M"})
+    assert compiled["args"][2:] == ["--merge-output-format", "mp4"]
+    assert all("[filesize<?500M]" in part for part in compiled["args"][1].split("/"))
@@ -3,24 +3,48 @@
 # sudo apt install python3-tk python3-pip python3-requests ffmpeg # Debian/Ubuntu
 # sudo dnf install python3-tkinter python3-pip python3-requests ffmpeg  # Fedora
 
+import time
+STARTUP_T0 = time.perf_counter()  # referencia para --bench-startup
+
 import sys
 import subprocess
 import importlib.util
 import platform
 import os
-import time
-import webbrowser
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, simpledialog
 import threading
 import queue
 import json
-import requests
+import enum
+import gzip
+import collections
+import itertools
+import signal
+import socket
+import stat
+import uuid
+from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 import shlex
 import re
+import shutil
+import random
+import bisect
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+# filedialog, simpledialog, webbrowser y requests se importan al usarse
+# para no retrasar la aparición de la ventana
+
+# Tk se importa solo al abrir la interfaz (load_tk): los modos sin interfaz
+# (--store/--worker, --bench-downloaders) funcionan sin python3-tk
+tk = ttk = messagebox = None
+
+def load_tk():
+    global tk, ttk, messagebox
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+
 # Configurar rutas persistentes
 def get_app_data_dir():
     home = Path.home()
@@ -34,6 +58,589 @@ def get_app_data_dir():
 APP_DATA_DIR = get_app_data_dir()
 CONFIG_PATH = APP_DATA_DIR / "config.json"
 QUEUE_PATH = APP_DATA_DIR / "queue.json"
+RELEASE_CACHE_PATH = APP_DATA_DIR / "release_cache.json"
+LOGS_DIR = APP_DATA_DIR / "logs"
+AUTH_DIR = APP_DATA_DIR / "auth"
+SUBSCRIPTIONS_DIR = APP_DATA_DIR / "subscriptions"
+CONTENT_INDEX_PATH = APP_DATA_DIR / "content_index.json"
+SYNC_CHECK_MS = 60 * 1000
+# Segundos sin progreso tras los que se mata un yt-dlp, por fase (0 = sin límite).
+# La unión con ffmpeg no escribe nada mientras trabaja: su ventana es mayor
+STALL_TIMEOUTS = {"download": 300, "merge": 1800}
+STALL_CHECK_MS = 5000
+# Elementos de la cola que se insertan en la lista por cada frame al cargar
+QUEUE_LOAD_CHUNK = 200
+MAX_LOG_FILES = 1000
+SUBS_SCRIPT_PATH = Path(__file__).with_name("subs.py")
+
+SUBTITLE_EXTENSIONS = (".srt", ".ass", ".ssa", ".vtt")
+
+# Líneas de yt-dlp que indican la ruta final del archivo descargado
+MEDIA_PATH_PATTERNS = [
+    re.compile(r'^\[Merger\] Merging formats into "(.+)"$'),
+    re.compile(r'^\[ExtractAudio\] Destination: (.+)$'),
+    re.compile(r'^\[download\] Destination: (.+)$'),
+    re.compile(r'^\[download\] (.+) has already been downloaded'),
+]
+
+_subs_module = None
+
+def load_subs_module():
+    """Carga subs.py (junto a este script) para reutilizar el mux de subtítulos"""
+    global _subs_module
+    if _subs_module is None and SUBS_SCRIPT_PATH.exists():
+        spec = importlib.util.spec_from_file_location("subs", SUBS_SCRIPT_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _subs_module = module
+    return _subs_module
+
+def iter_lines(stream, chunk_size=64 * 1024, max_line=8 * 1024, encoding="utf-8"):
+    """Lee una tubería binaria en bloques y devuelve sus líneas no vacías ya decodificadas.
+
+    Cada bloque se corta con bytes.split (búsqueda en C, sin pasar por la capa
+    de texto); una línea de más de max_line bytes se trunca y el resto se descarta.
+    """
+    fd = stream.fileno()
+    carry = b""
+    discarding = False
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            break
+        lines = (carry + chunk).split(b"\n") if carry else chunk.split(b"\n")
+        carry = lines.pop()
+        if discarding and lines:
+            # Fin de la línea larga que se estaba descartando
+            lines[0] = b""
+            discarding = False
+        for raw in lines:
+            raw = raw[:max_line].strip()
+            if raw:
+                yield raw.decode(encoding, "replace")
+        if len(carry) > max_line:
+            if not discarding:
+                raw = carry[:max_line].strip()
+                if raw:
+                    yield raw.decode(encoding, "replace")
+                discarding = True
+            carry = b""
+    carry = carry.strip()
+    if carry and not discarding:
+        yield carry[:max_line].decode(encoding, "replace")
+
+def parse_media_path(line):
+    """Devuelve la ruta del archivo multimedia si la línea la anuncia"""
+    for pattern in MEDIA_PATH_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            path = match.group(1)
+            if not path.lower().endswith(SUBTITLE_EXTENSIONS):
+                return path
+    return None
+
+def shared_subs():
+    """subs.py, que tiene el hash y la lectura con ffprobe compartidos con este programa"""
+    subs = load_subs_module()
+    if subs is None:
+        # OSError: "no se pudo verificar", nunca "archivo dañado"
+        raise FileNotFoundError("subs.py no encontrado (necesario para verificar y deduplicar)")
+    return subs
+
+def file_checksum(path):
+    """BLAKE2b del archivo ("blake2b:<hex>"), con la implementación de subs.py"""
+    return shared_subs().file_checksum(path)
+
+def find_ffprobe(ffmpeg_bin):
+    """ffprobe junto al ffmpeg configurado o en el PATH (None si no existe)"""
+    name = "ffprobe.exe" if platform.system() == "Windows" else "ffprobe"
+    candidate = os.path.join(os.path.dirname(ffmpeg_bin), name) if os.path.dirname(ffmpeg_bin) else ""
+    if candidate and os.path.exists(candidate):
+        return candidate
+    return shutil.which("ffprobe")
+
+def verify_media(path, ffprobe=None, expect_video=False):
+    """Comprueba que el archivo se puede leer (duración y pistas) y calcula su hash.
+
+    Devuelve {"size", "checksum", "duration", "streams"}; lanza RuntimeError si está dañado.
+    """
+    subs = shared_subs()
+    result = {"size": os.path.getsize(path), "duration": None, "streams": None}
+    if result["size"] == 0:
+        raise RuntimeError("archivo vacío")
+    if ffprobe:
+        duration, streams = subs.probe_media(path, ffprobe)
+        if expect_video and "video" not in streams:
+            raise RuntimeError("falta la pista de video")
+        result["duration"] = duration
+        result["streams"] = streams
+    result["checksum"] = subs.file_checksum(path)
+    return result
+
+def link_duplicate(existing, path):
+    """Sustituye path por un enlace duro (o reflink) a existing; False si no es posible"""
+    tmp_path = f"{path}.dedup-tmp"
+    try:
+        os.link(existing, tmp_path)
+    except OSError:
+        # Otro sistema de archivos: reflink si el sistema lo admite (btrfs, xfs...)
+        if platform.system() != "Linux":
+            return False
+        result = subprocess.run(["cp", "--reflink=always", existing, tmp_path],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    os.replace(tmp_path, path)
+    return True
+
+class ContentIndex:
+    """Archivos ya guardados por tamaño + hash e ids ya descargados, para no repetir contenido"""
+    def __init__(self, entries=()):
+        self.lock = threading.Lock()
+        self.by_size = collections.defaultdict(list)
+        self.by_id = {}
+        for entry in entries:
+            self._add(entry)
+
+    def _add(self, entry):
+        self.by_size[entry["size"]].append(entry)
+        if entry.get("id"):
+            self.by_id[entry["id"]] = entry
+
+    def find_id(self, media_id):
+        """Ruta ya descargada para ese id (None si no existe o ya no está en disco)"""
+        with self.lock:
+            entry = self.by_id.get(media_id) if media_id else None
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
+        return None
+
+    def find_duplicate(self, path, size, checksum=None):
+        """Busca un archivo igual; solo se calcula el hash si hay otro del mismo tamaño.
+
+        Devuelve (ruta existente o None, hash de path o None).
+        """
+        with self.lock:
+            candidates = [e for e in self.by_size.get(size, ())
+                          if os.path.abspath(e["path"]) != os.path.abspath(path)]
+        stats = []
+        for entry in candidates:
+            try:
+                st = os.stat(entry["path"])
+            except OSError:
+                continue
+            if st.st_size == size:
+                stats.append((entry, st))
+        if not stats:
+            return None, checksum
+        checksum = checksum or file_checksum(path)
+        for entry, st in stats:
+            # El hash guardado solo vale si el archivo no cambió desde entonces
+            if not entry.get("checksum") or (entry.get("mtime"), entry.get("ino")) != (st.st_mtime_ns, st.st_ino):
+                entry["checksum"] = file_checksum(entry["path"])
+                entry["mtime"], entry["ino"] = st.st_mtime_ns, st.st_ino
+            if entry["checksum"] == checksum:
+                return entry["path"], checksum
+        return None, checksum
+
+    def add(self, path, size, checksum=None, media_id=None):
+        try:
+            st = os.stat(path)
+            mtime, ino = st.st_mtime_ns, st.st_ino
+        except OSError:
+            mtime = ino = None
+        with self.lock:
+            self._add({"path": path, "size": size, "checksum": checksum, "id": media_id,
+                       "mtime": mtime, "ino": ino})
+
+    def entries(self):
+        """Copia de las entradas para guardarlas (las de archivos borrados se ignoran al buscar)"""
+        with self.lock:
+            return [dict(e) for entries in self.by_size.values() for e in entries]
+
+# Contenedor de destino al extraer audio sin recodificar (None = dejar tal cual)
+AUDIO_CONTAINERS = {
+    ".webm": ".opus",
+    ".mp4": ".m4a",
+    ".m4a": None,
+    ".opus": None,
+    ".ogg": None,
+    ".mp3": None,
+}
+
+def strip_format_suffix(path):
+    """Quita el sufijo .f<format_id> que se usa al descargar formatos por separado"""
+    return re.sub(r'\.f[^./\\]+(\.[^./\\]+)$', r'\1', path)
+
+def ytdlp_asset_name():
+    """Nombre del ejecutable de yt-dlp publicado para este sistema (None si no hay)"""
+    sistema = platform.system()
+    arch = platform.machine().lower()
+    arm = "arm" in arch or "aarch" in arch
+    if sistema == "Windows":
+        return "yt-dlp_win_arm64.exe" if arm else "yt-dlp.exe"
+    if sistema == "Linux":
+        return "yt-dlp_linux_aarch64" if arm else "yt-dlp"
+    if sistema == "Darwin":
+        return "yt-dlp_macos"
+    return None
+
+def parse_version(version):
+    """Convierte '2024.08.06' o 'yt-dlp 2024.08.06' en una tupla comparable"""
+    return tuple(int(part) for part in re.findall(r'\d+', version or ""))
+
+def open_in_browser(url):
+    import webbrowser
+    webbrowser.open(url)
+
+def find_ffmpeg(configured_path):
+    """Devuelve la ruta de FFmpeg (la configurada o la del PATH) o None"""
+    if configured_path and os.path.exists(configured_path):
+        return configured_path
+    return shutil.which("ffmpeg")
+
+def find_subtitle_sidecars(media_path):
+    """Busca subtítulos <stem>.<idioma>.<ext> junto al archivo descargado"""
+    directory, filename = os.path.split(media_path)
+    stem = os.path.splitext(filename)[0]
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in names
+        if name.startswith(stem + ".") and name.lower().endswith(SUBTITLE_EXTENSIONS)
+    )
+
+def default_tool_paths():
+    """Rutas por defecto de yt-dlp y FFmpeg según el sistema"""
+    if platform.system() == "Windows":
+        return os.path.join(os.getcwd(), "yt-dlp.exe"), os.path.join(os.getcwd(), "ffmpeg.exe")
+    return os.path.join(os.getcwd(), "yt-dlp"), "/usr/bin/ffmpeg"
+
+def load_headless_settings():
+    """Lee config.json sin Tk, para los modos sin interfaz"""
+    default_ytdlp, default_ffmpeg = default_tool_paths()
+    settings = {
+        "ytdlp_path": default_ytdlp,
+        "ffmpeg_path": default_ffmpeg,
+        "output_folder": str(Path.home() / "Downloads"),
+        "max_simultaneous": 1,
+        "retry_attempts": 5,
+        "concurrent_fragments": 5,
+        "postprocess_subs": False,
+        "sub_langs": "es.*",
+        "format_profiles": [],
+        "host_downloaders": {},
+        "default_downloader": "native",
+        "downloader_args": {},
+        "auth_profiles": {},
+        "verify_downloads": False,
+        "stall_timeouts": dict(STALL_TIMEOUTS),
+    }
+    try:
+        with open(CONFIG_PATH, "r") as f:
+            config = json.load(f)
+        settings.update({k: v for k, v in config.items() if k in settings})
+    except (OSError, ValueError):
+        pass
+    return settings
+
+# Versión del compilador de perfiles: si cambia, los selectores guardados se regeneran
+FORMAT_COMPILER_VERSION = 1
+DEFAULT_PROFILE = "Mejor video (default)"
+AUDIO_PROFILE = "Solo audio (mejor calidad)"
+RESOLUTION_LADDER = [360, 480, 720, 1080, 1440, 2160]
+# Extensión de audio que se une a cada contenedor sin recodificar
+NATIVE_AUDIO_EXT = {"mp4": "m4a", "webm": "webm"}
+
+# Perfiles fijos (los de la lista original); los del usuario se guardan en config.json
+BUILTIN_FORMAT_PROFILES = [
+    {"name": DEFAULT_PROFILE},
+    {"name": "360p", "height": 360},
+    {"name": "480p", "height": 480},
+    {"name": "720p", "height": 720},
+    {"name": "1080p", "height": 1080},
+    {"name": "2160p (4K)", "height": 2160},
+    {"name": AUDIO_PROFILE, "audio_only": True},
+]
+
+def format_filters(profile):
+    """Filtros de límite (tamaño/bitrate) que se aplican a todos los formatos"""
+    filters = ""
+    if profile.get("max_filesize"):
+        filters += f"[filesize<?{profile['max_filesize']}]"
+    if profile.get("max_tbr"):
+        filters += f"[tbr<=?{profile['max_tbr']}]"
+    return filters
+
+def compile_format_profile(profile):
+    """Compila un perfil a los argumentos de yt-dlp, con y sin FFmpeg separado.
+
+    El perfil admite: height, audio_only, vcodec, acodec, container,
+    max_filesize (ej. "500M") y max_tbr (kbps).
+    """
+    limits = format_filters(profile)
+    container = profile.get("container", "")
+    audio_ext = NATIVE_AUDIO_EXT.get(container, "")
+    audio_pref = ""
+    if profile.get("acodec"):
+        audio_pref += f"[acodec^={profile['acodec']}]"
+    if audio_ext:
+        audio_pref += f"[ext={audio_ext}]"
+    audio = "/".join(dict.fromkeys(f"ba{f}{limits}" for f in (audio_pref, "")))
+
+    if profile.get("audio_only"):
+        # -x sin --audio-format conserva el códec original: no se recodifica
+        return {
+            "args": ['-f', audio, '-x'], "ffmpeg": None,
+            "split_args": ['-f', audio], "split_ffmpeg": "extract",
+            "audio_only": True, "version": FORMAT_COMPILER_VERSION,
+        }
+
+    video_pref = ""
+    if profile.get("vcodec"):
+        video_pref += f"[vcodec^={profile['vcodec']}]"
+    if container:
+        video_pref += f"[ext={container}]"
+
+    if profile.get("height"):
+        # Resolución pedida o la siguiente disponible por encima
+        heights = [f"[height={r}]" for r in RESOLUTION_LADDER if r >= profile["height"]]
+    else:
+        heights = [""]
+
+    # "+" tiene más prioridad que "/": agrupar las alternativas de audio
+    merge_audio = f"({audio})" if "/" in audio else audio
+    best_video = "bv" if profile.get("height") else "bv*"
+    merged, video_only = [], []
+    # Primero los pares nativos (solo remux), luego cualquier códec
+    for pref in dict.fromkeys((video_pref, "")):
+        for height in heights:
+            merged.append(f"{best_video}{height}{pref}{limits}+{merge_audio}")
+            merged.append(f"b{height}{pref}{limits}")
+            video_only.append(f"{best_video}{height}{pref}{limits}")
+            video_only.append(f"b{height}{pref}{limits}")
+    merged.append(f"b{limits}")
+    video_only.append(f"b{limits}")
+
+    if not profile.get("height") and not video_pref and not limits:
+        # Sin preferencias: dejar que yt-dlp use su selección por defecto
+        args = []
+    else:
+        args = ['-f', "/".join(dict.fromkeys(merged))]
+    if container and args:
+        args += ['--merge-output-format', container]
+    return {
+        "args": args, "ffmpeg": None,
+        # Video y audio por separado (","); la unión la hace la cola de FFmpeg
+        "split_args": ['-f', "/".join(dict.fromkeys(video_only)) + "," + audio], "split_ffmpeg": "merge",
+        "audio_only": False, "version": FORMAT_COMPILER_VERSION,
+    }
+
+class FormatProfiles:
+    """Perfiles de formato; cada uno se compila una sola vez a sus argumentos"""
+    def __init__(self, custom=()):
+        self.definitions = {}
+        self.compiled = {}
+        self.custom = []
+        for profile in BUILTIN_FORMAT_PROFILES:
+            self.add(profile, builtin=True)
+        for profile in custom:
+            try:
+                self.add(profile)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Perfil de formato inválido {profile!r}: {e}")
+
+    def add(self, profile, builtin=False):
+        name = profile["name"]
+        definition = {k: v for k, v in profile.items() if k != "compiled"}
+        compiled = profile.get("compiled")
+        # Reutilizar el selector guardado si el perfil y el compilador no han cambiado
+        if not compiled or compiled.get("version") != FORMAT_COMPILER_VERSION \
+                or compiled.get("source") != definition:
+            compiled = compile_format_profile(definition)
+            compiled["source"] = definition
+        self.definitions[name] = definition
+        self.compiled[name] = compiled
+        if not builtin and name not in self.custom:
+            self.custom.append(name)
+
+    def names(self):
+        return list(self.definitions)
+
+    def get(self, name):
+        compiled = self.compiled.get(name)
+        if compiled is None:
+            # Nombres antiguos ("best", "720p"...): resolución deducida del texto
+            match = re.search(r'\d+', name or "")
+            compiled = compile_format_profile({"height": int(match.group()) if match else 720})
+            self.compiled[name] = compiled
+        return compiled
+
+    def args(self, name, split):
+        """Devuelve los argumentos -f/-x de yt-dlp y el trabajo de FFmpeg pendiente"""
+        compiled = self.get(name)
+        if split:
+            return list(compiled["split_args"]), compiled["split_ffmpeg"]
+        return list(compiled["args"]), compiled["ffmpeg"]
+
+    def audio_only(self, name):
+        return self.get(name)["audio_only"]
+
+    def to_config(self):
+        """Perfiles del usuario con su selector compilado, para config.json"""
+        return [dict(self.definitions[name], compiled=self.compiled[name]) for name in self.custom]
+
+# Motores de descarga: "native" es el de yt-dlp; el resto se pasa con --downloader.
+# aria2c abre varias conexiones por servidor y las reutiliza entre fragmentos.
+DOWNLOADER_BACKENDS = {
+    "native": None,
+    "aria2c": "-x 16 -s 16 -k 1M --file-allocation=none --summary-interval=1",
+}
+
+def match_host(url, mapping):
+    """Devuelve (host, valor) configurado para el host de la URL o un dominio padre"""
+    host = (urlparse(url).hostname or "").lower()
+    while host:
+        if host in mapping:
+            return host, mapping[host]
+        host = host.partition(".")[2]
+    return None, None
+
+def downloader_for_url(url, host_downloaders, default="native"):
+    """Motor asignado al host de la URL (o a un dominio padre) en la configuración"""
+    _, backend = match_host(url, host_downloaders)
+    return backend or default
+
+def downloader_args(backend, custom_args=None):
+    """Argumentos de yt-dlp para usar el motor indicado"""
+    if backend not in DOWNLOADER_BACKENDS:
+        print(f"Motor de descarga desconocido: {backend}; se usa el nativo")
+        return []
+    if backend == "native":
+        return []
+    args = (custom_args or {}).get(backend, DOWNLOADER_BACKENDS[backend])
+    cmd = ['--downloader', backend]
+    if args:
+        cmd.extend(['--downloader-args', f"{backend}:{args}"])
+    return cmd
+
+class AuthProfiles:
+    """Perfiles de autenticación por sitio (cookies y cabeceras) compartidos entre trabajos.
+
+    Las cookies del navegador se exportan una vez a un archivo común y solo se
+    renuevan cada `refresh_hours`. Cada trabajo recibe su propia copia, porque
+    yt-dlp reescribe el archivo de cookies al terminar.
+    """
+    def __init__(self, profiles, cache_dir):
+        self.profiles = profiles    # host -> {"cookies", "cookies_from_browser", "headers", "refresh_hours"}
+        self.cache_dir = Path(cache_dir)
+        self.lock = threading.Lock()
+        self.host_locks = {}
+
+    def host_lock(self, host):
+        with self.lock:
+            return self.host_locks.setdefault(host, threading.Lock())
+
+    def shared_jar(self, host, profile, ytdlp_path):
+        """Archivo de cookies común del perfil, renovándolo si ha caducado"""
+        if profile.get("cookies"):
+            return Path(profile["cookies"])
+        browser = profile.get("cookies_from_browser")
+        if not browser:
+            return None
+        jar = self.cache_dir / f"{host}.cookies.txt"
+        max_age = float(profile.get("refresh_hours", 12)) * 3600
+        # Un solo trabajo renueva; los demás esperan y reutilizan el resultado
+        with self.host_lock(host):
+            if not jar.exists() or time.time() - jar.stat().st_mtime > max_age:
+                self.refresh(jar, browser, ytdlp_path)
+        return jar if jar.exists() else None
+
+    def refresh(self, jar, browser, ytdlp_path):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = jar.with_name(f".{jar.name}.{uuid.uuid4().hex}.tmp")
+        # Sin URL, yt-dlp solo carga las cookies del navegador y las guarda al salir
+        try:
+            subprocess.run([ytdlp_path, "--cookies-from-browser", browser, "--cookies", str(tmp_path)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error exporting cookies from {browser}: {e}")
+        if tmp_path.exists() and tmp_path.stat().st_size:
+            os.replace(tmp_path, jar)
+        elif tmp_path.exists():
+            tmp_path.unlink()
+
+    def job_args(self, url, ytdlp_path):
+        """Argumentos de autenticación para un trabajo y los temporales a borrar al terminar"""
+        host, profile = match_host(url, self.profiles)
+        if not profile:
+            return [], []
+        args, temp_files = [], []
+        for name, value in profile.get("headers", {}).items():
+            args.extend(['--add-header', f"{name}:{value}"])
+        jar = self.shared_jar(host, profile, ytdlp_path)
+        if jar and jar.exists():
+            jobs_dir = self.cache_dir / "jobs"
+            jobs_dir.mkdir(parents=True, exist_ok=True)
+            job_jar = jobs_dir / f"{host}.{uuid.uuid4().hex}.txt"
+            shutil.copyfile(jar, job_jar)
+            args.extend(['--cookies', str(job_jar)])
+            temp_files.append(job_jar)
+        return args, temp_files
+
+    @staticmethod
+    def release(temp_files):
+        for path in temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def build_download_command(settings, url, custom_name, audio_only, format_args, split, output_path,
+                           downloader=None, auth_args=()):
+    """Construye la línea de comandos de yt-dlp a partir de la configuración"""
+    base_name = custom_name if custom_name != "Predeterminado" else "%(title)s"
+    if split:
+        output_template = os.path.join(output_path, f"{base_name}.f%(format_id)s.%(ext)s")
+    else:
+        output_template = os.path.join(output_path, f"{base_name}.%(ext)s")
+    cmd = [
+        settings["ytdlp_path"],
+        url,
+        "-o",
+        output_template,
+        "--newline"
+    ]
+
+    # Añadir parámetros de fragmentos concurrentes
+    cmd.extend(['--concurrent-fragments', str(settings["concurrent_fragments"])])
+
+    # Motor de descarga según el host (o el forzado, p. ej. en el benchmark)
+    if downloader is None:
+        downloader = downloader_for_url(url, settings.get("host_downloaders", {}),
+                                        settings.get("default_downloader", "native"))
+    cmd.extend(downloader_args(downloader, settings.get("downloader_args")))
+
+    # Cookies y cabeceras del perfil de autenticación del sitio
+    cmd.extend(auth_args)
+
+    # Añadir FFmpeg si está configurado
+    ffmpeg_path = settings["ffmpeg_path"]
+    if ffmpeg_path and os.path.exists(ffmpeg_path):
+        cmd.extend(['--ffmpeg-location', os.path.dirname(ffmpeg_path)])
+
+    # Subtítulos para la etapa de mux
+    if settings["postprocess_subs"] and not audio_only:
+        cmd.extend(['--write-subs', '--sub-langs', settings["sub_langs"] or "es.*", '--convert-subs', 'srt'])
+        if split:
+            cmd.extend(['-o', "subtitle:" + os.path.join(output_path, f"{base_name}.%(ext)s")])
+
+    cmd.extend(format_args)
+    return cmd
 
 class DarkTheme:
     @staticmethod
@@ -85,6 +692,1550 @@ class DarkTheme:
         # Fuente en negrita para la barra de estado
         style.configure('Bold.TLabel', font=('TkDefaultFont', 9, 'bold'))
 
+def atomic_write(path, write):
+    """Escribe con write(f) en un temporal binario del mismo directorio, lo sincroniza y lo renombra"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    fsync_directory(path.parent)
+
+def fsync_directory(directory):
+    """Que un renombrado dentro de directory sobreviva a un corte de luz (no disponible en Windows)"""
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def atomic_write_json(path, data):
+    """Escribe JSON de forma atómica (temporal, fsync y renombrado)"""
+    atomic_write(path, lambda f: f.write(json.dumps(data).encode("utf-8")))
+
+# Volcado por columnas: <nombre>.columns.json.gz
+QUEUE_COLUMNS_SUFFIX = ".columns.json.gz"
+QUEUE_COLUMNS = ("url", "custom_name", "resolution", "status", "log", "path", "size", "checksum")
+# Columnas con pocos valores distintos: se guardan como diccionario + índices
+DICTIONARY_COLUMNS = ("resolution", "status")
+
+def write_queue_ndjson(f, records):
+    """Un registro JSON por línea; comprimido con gzip si se pide .gz"""
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+def iter_queue_ndjson(path):
+    """Lee un NDJSON (opcionalmente .gz) registro a registro, sin cargarlo entero"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Típico de una copia cortada: se salta la línea y se sigue
+                print(f"{path}:{number}: línea no válida, se omite")
+
+def queue_to_columns(records):
+    """Registros de la cola en columnas; las de pocos valores, codificadas con diccionario"""
+    columns = {name: [] for name in QUEUE_COLUMNS}
+    for record in records:
+        for name in QUEUE_COLUMNS:
+            columns[name].append(record.get(name))
+    for name in DICTIONARY_COLUMNS:
+        values = {}
+        codes = [values.setdefault(value, len(values)) for value in columns[name]]
+        columns[name] = {"values": list(values), "codes": codes}
+    return {"format": "queue-columns", "version": 1, "count": len(columns["url"]), "columns": columns}
+
+def iter_queue_columns(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        dump = json.load(f)
+    if dump.get("format") != "queue-columns":
+        raise ValueError(f"{path}: no es un volcado de cola por columnas")
+    columns = dict(dump["columns"])
+    for name in DICTIONARY_COLUMNS:
+        encoded = columns.get(name)
+        if encoded:
+            columns[name] = [encoded["values"][code] for code in encoded["codes"]]
+    names = [name for name in QUEUE_COLUMNS if columns.get(name)]
+    for row in zip(*(columns[name] for name in names)):
+        yield {name: value for name, value in zip(names, row) if value is not None}
+
+def write_queue_records(path, records):
+    """Exporta la cola según la extensión: .columns.json.gz, .ndjson/.jsonl (.gz) o JSON"""
+    name = str(path)
+    if name.endswith(QUEUE_COLUMNS_SUFFIX):
+        dump = json.dumps(queue_to_columns(records)).encode("utf-8")
+        atomic_write(path, lambda f: f.write(gzip.compress(dump)))
+    elif name.endswith(".gz"):
+        def write(f):
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                write_queue_ndjson(gz, records)
+        atomic_write(path, write)
+    elif name.endswith((".ndjson", ".jsonl")):
+        atomic_write(path, lambda f: write_queue_ndjson(f, records))
+    else:
+        atomic_write_json(path, list(records))
+
+def iter_queue_records(path):
+    """Registros de una cola exportada (o de queue.json) en el orden original"""
+    name = str(path)
+    if name.endswith(QUEUE_COLUMNS_SUFFIX):
+        return iter_queue_columns(path)
+    if name.endswith((".ndjson", ".jsonl", ".ndjson.gz", ".jsonl.gz")):
+        return iter_queue_ndjson(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return iter(json.load(f))
+
+class PersistenceWriter:
+    """Guarda archivos JSON desde un hilo propio, agrupando ráfagas de cambios.
+
+    Solo se escribe la última versión de cada archivo, `delay` segundos
+    después del último cambio.
+    """
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.pending = {}   # path -> (datos, función de escritura)
+        self.deadline = 0
+        self.stopped = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, path, data, writer=atomic_write_json):
+        with self.cond:
+            self.pending[path] = (data, writer)
+            self.deadline = time.monotonic() + self.delay
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.stopped and (not self.pending or time.monotonic() < self.deadline):
+                    self.cond.wait(self.deadline - time.monotonic() if self.pending else None)
+                if not self.pending:
+                    return
+                batch, self.pending = self.pending, {}
+            for path, (data, writer) in batch.items():
+                try:
+                    writer(path, data)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"Error saving {path}: {e}")
+
+    def stop(self, timeout=10):
+        """Escribe lo pendiente sin esperar al temporizador y termina el hilo"""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        self.thread.join(timeout)
+
+class PostProcessPipeline:
+    """Cadena de etapas de post-proceso, cada una con su propio pool de hilos acotado"""
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, func, workers):
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pp-{name}")
+        self.stages.append((name, func, executor))
+
+    def submit(self, job, on_done, on_stage=None, on_span=None):
+        """Encola un trabajo; on_done(job, error) se llama al terminar la última etapa.
+
+        on_span(job, etapa, inicio, fin) recibe lo que tardó cada etapa en ejecutarse.
+        """
+        self._run_stage(0, job, on_done, on_stage, on_span)
+
+    def _run_stage(self, index, job, on_done, on_stage, on_span):
+        if index >= len(self.stages):
+            on_done(job, None)
+            return
+
+        name, func, executor = self.stages[index]
+        if on_stage:
+            on_stage(job, name)
+
+        def timed(job):
+            start = time.perf_counter()
+            try:
+                return func(job)
+            finally:
+                if on_span:
+                    on_span(job, name, start, time.perf_counter())
+
+        def next_stage(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                on_done(job, f"{name}: {e}")
+                return
+            self._run_stage(index + 1, result if result is not None else job, on_done, on_stage, on_span)
+
+        try:
+            executor.submit(timed, job).add_done_callback(next_stage)
+        except RuntimeError:
+            # El pool ya se cerró (aplicación cerrándose)
+            pass
+
+    def shutdown(self):
+        for _, _, executor in self.stages:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+class YtDlpUpdateService:
+    """Consulta la última versión de yt-dlp con caché (ETag) y descarga el binario nuevo"""
+    RELEASES_URL = "https://api.github.com/repos/yt-dlp/yt-dlp/releases/latest"
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.cache = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = str(self.cache_path) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def latest_release(self):
+        """Devuelve {'version', 'assets'}; con ETag la respuesta 304 no descarga nada"""
+        import requests
+        headers = {"Accept": "application/vnd.github+json"}
+        with self.lock:
+            cached = self.cache.get("release")
+            if cached and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+
+        response = requests.get(self.RELEASES_URL, headers=headers, timeout=15)
+        if response.status_code == 304 and cached:
+            return cached
+        response.raise_for_status()
+
+        data = response.json()
+        release = {
+            "etag": response.headers.get("ETag"),
+            "version": data.get("tag_name", ""),
+            "assets": {a["name"]: a["browser_download_url"] for a in data.get("assets", [])},
+        }
+        with self.lock:
+            self.cache["release"] = release
+            self._save()
+        return release
+
+    def local_version(self, ytdlp_path):
+        """Versión del binario local; solo se ejecuta --version si el archivo cambió"""
+        stat = os.stat(ytdlp_path)
+        key = [ytdlp_path, stat.st_mtime, stat.st_size]
+        with self.lock:
+            cached = self.cache.get("local")
+            if cached and cached.get("key") == key:
+                return cached["version"]
+
+        version = subprocess.check_output(
+            [ytdlp_path, "--version"],
+            stderr=subprocess.STDOUT,
+            text=True
+        ).strip()
+        with self.lock:
+            self.cache["local"] = {"key": key, "version": version}
+            self._save()
+        return version
+
+    @staticmethod
+    def expected_sha256(release, asset):
+        """SHA-256 publicado para el binario en el SHA2-256SUMS de la versión"""
+        import requests
+        url = release["assets"].get("SHA2-256SUMS")
+        if not url:
+            raise RuntimeError("la versión no publica SHA2-256SUMS")
+        response = requests.get(url, timeout=15)
+        response.raise_for_status()
+        for line in response.text.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].lstrip("*") == asset:
+                return parts[0].lower()
+        raise RuntimeError(f"{asset} no aparece en SHA2-256SUMS")
+
+    def download(self, url, ytdlp_path, sha256, progress=None):
+        """Descarga el binario junto al actual (mismo volumen), comprueba su SHA-256 y devuelve la ruta temporal"""
+        import hashlib
+        import requests
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(ytdlp_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".yt-dlp-update.", suffix=".tmp", dir=directory)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f, requests.get(url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                total = int(response.headers.get("Content-Length") or 0)
+                done = 0
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+                f.flush()
+                os.fsync(f.fileno())
+            if digest.hexdigest() != sha256:
+                raise RuntimeError("el SHA-256 del binario descargado no coincide con SHA2-256SUMS")
+            shutil.copymode(ytdlp_path, tmp_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def install(tmp_path, ytdlp_path):
+        """Sustituye el binario de forma atómica"""
+        os.replace(tmp_path, ytdlp_path)
+        fsync_directory(os.path.dirname(os.path.abspath(ytdlp_path)))
+
+# Restos de una descarga a medias que yt-dlp continúa en lugar de sobrescribir
+OUTPUT_LEFTOVER_EXTENSIONS = ("part", "ytdl", "temp")
+
+class OutputPathIndex:
+    """Nombres de salida reservados por los trabajos, para que dos no escriban el mismo archivo.
+
+    La clave es carpeta + nombre sin extensión: así cubre las partes .fNNN,
+    los subtítulos y el archivo final de cada trabajo. Las reservas no se
+    liberan al terminar ni al quitar la fila: el nombre sigue en uso por el
+    archivo (o el .part) que quedó en disco.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.claims = {}    # clave -> item
+        self.by_item = {}   # item -> clave
+
+    @staticmethod
+    def key(folder, stem):
+        return os.path.normcase(os.path.abspath(os.path.join(folder, stem)))
+
+    def claim(self, item, folder, stem):
+        """Reserva el nombre o el primer "nombre (N)" libre y lo devuelve.
+
+        Un nombre está ocupado si lo reservó otro trabajo o si ya hay un archivo
+        terminado <nombre>.<ext> en la carpeta, salvo que sea la reserva de este
+        mismo trabajo. Los restos .part, .ytdl y .fNNN no lo ocupan: tras un
+        reinicio el trabajo que los dejó continúa la descarga con el mismo nombre.
+        """
+        try:
+            existing = [os.path.normcase(name) for name in os.listdir(folder)]
+        except OSError:
+            existing = []
+        with self.lock:
+            own = self.by_item.get(item)
+            candidate, n = stem, 2
+            while not self._free(item, own, folder, candidate, existing):
+                candidate = f"{stem} ({n})"
+                n += 1
+            key = self.key(folder, candidate)
+            if own and own != key:
+                self.claims.pop(own, None)
+            self.claims[key] = item
+            self.by_item[item] = key
+            return candidate
+
+    def _free(self, item, own, folder, candidate, existing):
+        key = self.key(folder, candidate)
+        if key == own:
+            return True
+        if self.claims.get(key, item) != item:
+            return False
+        prefix = os.path.normcase(candidate) + "."
+        for name in existing:
+            if not name.startswith(prefix):
+                continue
+            ext = name[len(prefix):]
+            if "." not in ext and ext not in OUTPUT_LEFTOVER_EXTENSIONS:
+                return False
+        return True
+
+class DiskScheduler:
+    """Reserva espacio en disco por trabajo y elige la carpeta destino con sitio"""
+    def __init__(self, margin=1.1, floor=512 * 1024 * 1024):
+        self.margin = margin      # holgura sobre el tamaño estimado
+        self.floor = floor        # espacio que siempre se deja libre
+        self.lock = threading.Lock()
+        self.reservations = {}    # item -> [carpeta, dispositivo, bytes, bytes ya escritos]
+        self.files = {}           # item -> {archivo: mayor tamaño visto}
+        self.current = {}         # item -> archivo que se está escribiendo
+
+    @staticmethod
+    def _device(folder):
+        try:
+            return os.stat(folder).st_dev
+        except OSError:
+            return None
+
+    def available(self, folder):
+        """Bytes libres en la carpeta descontando lo reservado en ese volumen y aún no escrito.
+
+        Lo que los trabajos ya escribieron está descontado en el espacio libre del disco.
+        """
+        device = self._device(folder)
+        reserved = sum(max(0, size - written) for _, dev, size, written in self.reservations.values()
+                       if dev == device)
+        return shutil.disk_usage(folder).free - reserved - self.floor
+
+    def admit(self, item, size, folders):
+        """Reserva espacio y devuelve la carpeta elegida, o None si no cabe en ninguna"""
+        needed = int((size or 0) * self.margin)
+        with self.lock:
+            candidates = []
+            for folder in folders:
+                try:
+                    os.makedirs(folder, exist_ok=True)
+                    candidates.append((self.available(folder), folder))
+                except OSError:
+                    continue
+            # El volumen con más espacio libre primero
+            for available, folder in sorted(candidates, reverse=True):
+                if available >= needed:
+                    self.reservations[item] = [folder, self._device(folder), needed, 0]
+                    return folder
+        return None
+
+    def new_file(self, item, path):
+        """Archivo que el trabajo empieza (o continúa) a escribir"""
+        with self.lock:
+            self.current[item] = path
+
+    def written(self, item, downloaded):
+        """Bytes del archivo actual según el progreso de yt-dlp.
+
+        Se cuenta por archivo el mayor valor visto, así que un reintento que
+        continúa su .part no vuelve a sumar lo que ya estaba escrito.
+        """
+        with self.lock:
+            reservation = self.reservations.get(item)
+            if reservation is None:
+                return
+            seen = self.files.setdefault(item, {})
+            path = self.current.get(item)
+            grown = downloaded - seen.get(path, 0)
+            if grown > 0:
+                seen[path] = downloaded
+                reservation[3] += grown
+
+    def has_headroom(self, item):
+        """Indica si el volumen de un trabajo admitido aún tiene espacio libre"""
+        with self.lock:
+            reservation = self.reservations.get(item)
+            if reservation is None:
+                return True
+            try:
+                return shutil.disk_usage(reservation[0]).free > self.floor
+            except OSError:
+                return False
+
+    def release(self, item):
+        with self.lock:
+            self.files.pop(item, None)
+            self.current.pop(item, None)
+            return self.reservations.pop(item, None) is not None
+
+class SharedJobStore:
+    """Cola de trabajos en una carpeta compartida (local, NFS, SMB...).
+
+    Cada trabajo es un JSON en jobs/ y quien lo procesa tiene un lease en leases/
+    que renueva periódicamente. Si un nodo muere, su lease caduca y otro nodo
+    recupera el trabajo. Solo se usan operaciones atómicas del sistema de archivos
+    (creación exclusiva y rename), sin servidor ni base de datos.
+    """
+    def __init__(self, root, lease_seconds=60):
+        self.root = Path(root)
+        self.jobs_dir = self.root / "jobs"
+        self.leases_dir = self.root / "leases"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.leases_dir.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, url, custom_name="Predeterminado", resolution=DEFAULT_PROFILE):
+        # El prefijo temporal mantiene el orden de llegada al listar
+        job_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self._write_json(self.jobs_dir / f"{job_id}.json", {
+            "id": job_id,
+            "url": url,
+            "custom_name": custom_name,
+            "resolution": resolution,
+            "status": "En cola",
+            "attempts": 0,
+            "node": None,
+        })
+        return job_id
+
+    def jobs(self):
+        for path in sorted(self.jobs_dir.glob("*.json")):
+            job = self._read_json(path)
+            if job:
+                yield job
+
+    def update(self, job):
+        self._write_json(self.jobs_dir / f"{job['id']}.json", job)
+
+    def _lease_path(self, job_id):
+        return self.leases_dir / f"{job_id}.lease"
+
+    def _try_lease(self, job_id, node):
+        lease_path = self._lease_path(job_id)
+        lease = self._read_json(lease_path)
+        if lease is not None:
+            if lease.get("expires", 0) > time.time():
+                return False
+            # Lease caducado: solo un nodo gana el rename
+            stale_path = lease_path.with_name(f"{lease_path.name}.stale-{uuid.uuid4().hex}")
+            try:
+                os.rename(lease_path, stale_path)
+            except OSError:
+                return False
+            # Entre la lectura y el rename otro nodo pudo recuperarlo y crear uno nuevo:
+            # si lo apartado no es el lease caducado que se leyó, se devuelve a su sitio
+            if self._read_json(stale_path) != lease:
+                self._restore_lease(stale_path, lease_path)
+                return False
+            os.remove(stale_path)
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump({"node": node, "expires": time.time() + self.lease_seconds}, f)
+        return True
+
+    @staticmethod
+    def _restore_lease(stale_path, lease_path):
+        try:
+            # link no pisa un lease creado entretanto por un tercer nodo
+            os.link(stale_path, lease_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Sistemas de archivos sin enlaces duros
+            try:
+                os.rename(stale_path, lease_path)
+                return
+            except OSError:
+                pass
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+    def claim(self, node):
+        """Reclama el siguiente trabajo pendiente (o abandonado) para este nodo"""
+        for job in self.jobs():
+            job_id = job["id"]
+            if job["status"] not in ("En cola", "Descargando"):
+                continue
+            if not self._try_lease(job_id, node):
+                continue
+            # Releer tras obtener el lease: otro nodo pudo terminarlo entretanto
+            job = self._read_json(self.jobs_dir / f"{job_id}.json")
+            if not job or job["status"] not in ("En cola", "Descargando"):
+                self.release(job_id, node)
+                continue
+            job["status"] = "Descargando"
+            job["node"] = node
+            job["attempts"] += 1
+            self.update(job)
+            return job
+        return None
+
+    def heartbeat(self, job_id, node):
+        """Renueva el lease; devuelve False si ya no pertenece a este nodo"""
+        lease_path = self._lease_path(job_id)
+        lease = self._read_json(lease_path)
+        if not lease or lease.get("node") != node:
+            return False
+        self._write_json(lease_path, {"node": node, "expires": time.time() + self.lease_seconds})
+        return True
+
+    def release(self, job_id, node):
+        lease_path = self._lease_path(job_id)
+        lease = self._read_json(lease_path)
+        if lease and lease.get("node") == node:
+            try:
+                os.remove(lease_path)
+            except OSError:
+                pass
+
+class WorkerNode:
+    """Motor sin interfaz que procesa trabajos de un SharedJobStore"""
+    def __init__(self, store, settings, slots=None, node=None):
+        self.store = store
+        self.settings = settings
+        self.profiles = FormatProfiles(settings["format_profiles"])
+        self.auth = AuthProfiles(settings["auth_profiles"], AUTH_DIR)
+        self.slots = slots or settings["max_simultaneous"]
+        self.node = node or f"{socket.gethostname()}-{os.getpid()}"
+        self.running = {}   # job_id -> Popen
+        self.watchdog = StallWatchdog(settings["stall_timeouts"])
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def log(self, message):
+        print(f"[{self.node}] {message}", flush=True)
+
+    def run(self, poll_interval=5):
+        threading.Thread(target=self.heartbeat_loop, daemon=True).start()
+        self.log(f"procesando {self.store.root} con {self.slots} slots")
+        try:
+            while not self.stop_event.is_set():
+                with self.lock:
+                    free = self.slots - len(self.running)
+                job = self.store.claim(self.node) if free > 0 else None
+                if job is None:
+                    self.stop_event.wait(poll_interval)
+                    continue
+                with self.lock:
+                    self.running[job["id"]] = None
+                threading.Thread(target=self.run_job, args=(job,), daemon=True).start()
+        except KeyboardInterrupt:
+            self.stop_event.set()
+        finally:
+            with self.lock:
+                for job_id, process in self.running.items():
+                    if process:
+                        process.terminate()
+                    # Liberar el lease para que otro nodo lo tome sin esperar
+                    self.store.release(job_id, self.node)
+
+    def heartbeat_loop(self):
+        interval = max(1, self.store.lease_seconds / 3)
+        while not self.stop_event.wait(interval):
+            with self.lock:
+                running = list(self.running.items())
+            for job_id, process in running:
+                if not self.store.heartbeat(job_id, self.node) and process:
+                    # Otro nodo recuperó el trabajo: no duplicar la descarga
+                    self.log(f"lease perdido: {job_id}")
+                    process.terminate()
+            for job_id, phase, idle in self.watchdog.stalled():
+                with self.lock:
+                    process = self.running.get(job_id)
+                if process:
+                    self.log(f"sin progreso durante {format_duration(idle)} ({STALL_PHASE_LABELS[phase]}): {job_id}")
+                    kill_process_tree(process)
+
+    def run_job(self, job):
+        self.log(f"descargando {job['url']} (intento {job['attempts']})")
+        format_args, _ = self.profiles.args(job["resolution"], False)
+        auth_args, auth_files = self.auth.job_args(job["url"], self.settings["ytdlp_path"])
+        cmd = build_download_command(self.settings, job["url"], job["custom_name"],
+                                     self.profiles.audio_only(job["resolution"]),
+                                     format_args, False, self.settings["output_folder"],
+                                     auth_args=auth_args)
+        last_line = ""
+        media_path = None
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                start_new_session=True
+            )
+            with self.lock:
+                self.running[job["id"]] = process
+            self.watchdog.start(job["id"])
+            for last_line in iter_lines(process.stdout):
+                self.watchdog.feed(job["id"], last_line)
+                media_path = parse_media_path(last_line) or media_path
+            returncode = process.wait()
+        except OSError as e:
+            returncode, last_line = -1, str(e)
+        finally:
+            self.auth.release(auth_files)
+        stall = self.watchdog.finish(job["id"])
+        if stall and returncode != 0:
+            # Cuenta como intento fallido: se reencola si quedan
+            last_line = f"sin progreso durante {format_duration(stall[1])} ({STALL_PHASE_LABELS[stall[0]]})"
+
+        with self.lock:
+            self.running.pop(job["id"], None)
+        if returncode == 0 and self.settings["verify_downloads"] and media_path and os.path.exists(media_path):
+            try:
+                verified = verify_media(media_path, find_ffprobe(find_ffmpeg(self.settings["ffmpeg_path"]) or ""),
+                                        not self.profiles.audio_only(job["resolution"]))
+                job.update({"path": media_path, "size": verified["size"], "checksum": verified["checksum"]})
+            except RuntimeError as e:
+                # Archivo dañado: se borra y cuenta como intento fallido (se reencola si quedan)
+                os.remove(media_path)
+                returncode, last_line = -1, f"verificación: {e}"
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.log(f"no se pudo verificar {media_path}: {e}")
+        if returncode == 0:
+            job["status"] = "Completado"
+        elif job["attempts"] <= self.settings["retry_attempts"]:
+            job["status"] = "En cola"
+        else:
+            job["status"] = "Fallido"
+        job["error"] = None if returncode == 0 else last_line
+        # Solo escribir si el lease sigue siendo nuestro
+        if self.store.heartbeat(job["id"], self.node):
+            self.store.update(job)
+            self.store.release(job["id"], self.node)
+        self.log(f"{job['status']}: {job['url']}")
+
+def fetch_new_entries(ytdlp_path, url, archive_path, date_after=None, max_items=20, auth_args=()):
+    """Lista las entradas del canal posteriores a la última vista, de la más nueva a la más antigua.
+
+    Devuelve [(clave de archivo, url)]; yt-dlp corta al llegar a una entrada ya archivada.
+    """
+    cmd = [ytdlp_path, url, "--flat-playlist", "--no-warnings", "--ignore-errors",
+           "--break-on-existing", "--download-archive", str(archive_path),
+           "-I", f":{max_items}",
+           "--print", "%(ie_key,extractor_key)s\t%(id)s\t%(webpage_url,url)s"]
+    if date_after:
+        cmd.extend(["--dateafter", date_after])
+    cmd.extend(auth_args)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding="utf-8", errors="replace", timeout=600)
+    
+    known = set()
+    if os.path.exists(archive_path):
+        with open(archive_path, "r", encoding="utf-8") as f:
+            known = {line.strip() for line in f}
+    entries = []
+    for line in result.stdout.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 3 or fields[0] == "NA":
+            continue
+        key = f"{fields[0].lower()} {fields[1]}"
+        # Mismo corte que --break-on-existing, por si el extractor no lo aplica en modo plano
+        if key in known:
+            break
+        entries.append((key, fields[2]))
+    if not entries and result.returncode not in (0, 101):
+        # 101: yt-dlp se detuvo por --break-on-existing
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else
+                           f"yt-dlp terminó con código {result.returncode}")
+    return entries
+
+class SubscriptionScheduler:
+    """Suscripciones periódicas a canales; reparte las sincronizaciones en el tiempo"""
+    def __init__(self, subscriptions, jitter=0.1):
+        self.subscriptions = subscriptions  # dicts guardados en config.json
+        self.jitter = jitter
+        self.next_run = {}
+        self.running = set()
+        now = time.time()
+        for sub in subscriptions:
+            self.schedule(sub, now)
+
+    def schedule(self, sub, now):
+        interval = sub.get("every_hours", 6) * 3600
+        # Las atrasadas no salen todas a la vez: desfase aleatorio de hasta un 10% del intervalo
+        base = max((sub.get("last_sync") or 0) + interval, now)
+        self.next_run[sub["id"]] = base + random.uniform(0, interval * self.jitter)
+
+    def add(self, url, every_hours, resolution, max_items=20):
+        sub = {"id": uuid.uuid4().hex[:12], "url": url, "every_hours": every_hours,
+               "resolution": resolution, "max_items": max_items, "last_sync": None}
+        self.subscriptions.append(sub)
+        # Primera sincronización en el siguiente ciclo
+        self.next_run[sub["id"]] = time.time()
+        return sub
+
+    def due(self, now):
+        """Suscripciones que tocan ahora; quedan marcadas como en curso"""
+        subs = [sub for sub in self.subscriptions
+                if sub["id"] not in self.running and self.next_run.get(sub["id"], 0) <= now]
+        self.running.update(sub["id"] for sub in subs)
+        return subs
+
+    def finished(self, sub, now, ok):
+        self.running.discard(sub["id"])
+        if ok:
+            sub["last_sync"] = now
+        self.schedule(sub, now)
+
+class JobStatus(enum.IntEnum):
+    QUEUED = 0
+    DOWNLOADING = 1
+    POSTPROCESSING = 2
+    WAITING_SPACE = 3
+    COMPLETED = 4
+    FAILED = 5
+
+    @property
+    def label(self):
+        return STATUS_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        for status, status_label in STATUS_LABELS.items():
+            if status_label == label:
+                return status
+        # Estados antiguos tipo "Error: ..." se cargan como fallidos
+        return cls.FAILED if label.startswith("Error") else cls.QUEUED
+
+# Textos que se muestran en la lista y se guardan en queue.json
+STATUS_LABELS = {
+    JobStatus.QUEUED: "En cola",
+    JobStatus.DOWNLOADING: "Descargando",
+    JobStatus.POSTPROCESSING: "Post-procesando",
+    JobStatus.WAITING_SPACE: "Esperando espacio",
+    JobStatus.COMPLETED: "Completado",
+    JobStatus.FAILED: "Fallido",
+}
+
+PROGRESS_PATTERN = re.compile(
+    r'^\[download\]\s+([\d.]+)% of\s+~?\s*([\d.]+)([KMGT]?i?B)'
+    r'(?:.*? at\s+([\d.]+)([KMGT]?i?B)/s)?(?:.*? ETA\s+([\d:]+))?'
+)
+SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+              "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4}
+
+# Resumen de aria2c (--summary-interval): [#2089b0 400.0KiB/33.2MiB(1%) CN:16 DL:115.7KiB ETA:4m51s]
+ARIA2C_PROGRESS_PATTERN = re.compile(
+    r'^\[#\w+\s+([\d.]+)([KMGT]?i?B)/([\d.]+)([KMGT]?i?B)\(\d+%\)'
+    r'(?:.*? DL:([\d.]+)([KMGT]?i?B))?(?:.*? ETA:((?:\d+h)?(?:\d+m)?(?:\d+s)?))?'
+)
+# Líneas que aria2c repite en cada resumen aunque no avance
+ARIA2C_SUMMARY_PREFIXES = ("*** Download Progress Summary", "FILE:", "====", "----")
+
+def parse_aria2c_progress(line):
+    """Como parse_progress, para la línea de resumen de aria2c"""
+    match = ARIA2C_PROGRESS_PATTERN.match(line)
+    if not match:
+        return None
+    done = float(match.group(1)) * SIZE_UNITS.get(match.group(2), 1)
+    total = int(float(match.group(3)) * SIZE_UNITS.get(match.group(4), 1))
+    if not total:
+        return None
+    speed = int(float(match.group(5)) * SIZE_UNITS.get(match.group(6), 1)) if match.group(5) else 0
+    eta = 0
+    for value, unit in re.findall(r'(\d+)([hms])', match.group(7) or ""):
+        eta += int(value) * {"h": 3600, "m": 60, "s": 1}[unit]
+    return done * 100 / total, total, speed, eta
+
+def parse_progress(line):
+    """Extrae (porcentaje, bytes totales, bytes/s, ETA en s) de una línea de progreso de yt-dlp o aria2c"""
+    if line.startswith("[#"):
+        return parse_aria2c_progress(line)
+    match = PROGRESS_PATTERN.match(line)
+    if not match:
+        return None
+    percent = float(match.group(1))
+    total = int(float(match.group(2)) * SIZE_UNITS.get(match.group(3), 1))
+    speed = int(float(match.group(4)) * SIZE_UNITS.get(match.group(5), 1)) if match.group(4) else 0
+    eta = 0
+    if match.group(6):
+        for part in match.group(6).split(":"):
+            eta = eta * 60 + int(part)
+    return percent, total, speed, eta
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+def format_size(num_bytes):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TiB"
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class QueueStats:
+    """Caudal total (media móvil exponencial) y ETA de la cola a partir de los bytes de cada trabajo.
+
+    Los totales se mantienen de forma incremental: cada tick cuesta O(1)
+    independientemente del tamaño de la cola.
+    """
+    def __init__(self, tau=5.0, history=40):
+        self.tau = tau
+        self.lock = threading.Lock()
+        self.last_bytes = {}        # item -> bytes descargados del archivo actual (None: aún sin dato)
+        self.current = {}           # item -> archivo que se está descargando
+        self.expected = {}          # item -> [tamaño estimado, bytes descargados]
+        self.expected_total = 0
+        self.done_total = 0
+        self.sizes_sum = 0          # para estimar los trabajos aún sin sondear
+        self.sizes_count = 0
+        self.window_bytes = 0
+        self.rate = 0.0
+        self.last_tick = time.monotonic()
+        self.history = collections.deque(maxlen=history)
+
+    def expect(self, item, size):
+        """Tamaño sondeado de un trabajo que empieza a descargar"""
+        with self.lock:
+            self._forget(item)
+            self.expected[item] = [size, 0]
+            self.expected_total += size
+            self.sizes_sum += size
+            self.sizes_count += 1
+
+    def new_file(self, item, path):
+        """yt-dlp anunció un destino; si es otro archivo (audio tras video) su contador se reinicia.
+
+        Un reintento vuelve a anunciar el mismo destino y continúa su .part: no se reinicia.
+        """
+        with self.lock:
+            if self.current.get(item) != path:
+                self.current[item] = path
+                self.last_bytes[item] = None
+
+    def progress(self, item, downloaded):
+        """Registra los bytes del archivo actual; devuelve los nuevos desde la última vez"""
+        with self.lock:
+            last = self.last_bytes.get(item)
+            if last is None:
+                # Primer dato del archivo: lo que ya estaba (una descarga reanudada) cuenta
+                # como hecho para la ETA pero no como caudal
+                self.last_bytes[item] = downloaded
+                self._count_done(item, downloaded)
+                return 0
+            # El total "~" de las descargas por fragmentos sube y baja: un retroceso no es un archivo nuevo
+            delta = downloaded - last
+            if delta <= 0:
+                return 0
+            self.last_bytes[item] = downloaded
+            self.window_bytes += delta
+            self._count_done(item, delta)
+            return delta
+
+    def _count_done(self, item, nbytes):
+        entry = self.expected.get(item)
+        if entry:
+            counted = min(nbytes, max(0, entry[0] - entry[1]))
+            entry[1] += counted
+            self.done_total += counted
+
+    def finish(self, item):
+        with self.lock:
+            self._forget(item)
+
+    def _forget(self, item):
+        self.last_bytes.pop(item, None)
+        self.current.pop(item, None)
+        entry = self.expected.pop(item, None)
+        if entry:
+            self.expected_total -= entry[0]
+            self.done_total -= entry[1]
+
+    def tick(self):
+        """Actualiza la media con los bytes recibidos desde el tick anterior"""
+        now = time.monotonic()
+        with self.lock:
+            elapsed = max(now - self.last_tick, 1e-3)
+            instant = self.window_bytes / elapsed
+            self.window_bytes = 0
+            self.last_tick = now
+            alpha = 1 - math.exp(-elapsed / self.tau)
+            self.rate += alpha * (instant - self.rate)
+            self.history.append(self.rate)
+        return self.rate
+
+    def eta(self, unprobed_jobs):
+        """Segundos para vaciar la cola; los trabajos sin sondear cuentan con el tamaño medio"""
+        with self.lock:
+            remaining = self.expected_total - self.done_total
+            if unprobed_jobs and self.sizes_count:
+                remaining += unprobed_jobs * self.sizes_sum / self.sizes_count
+        if self.rate < 1 or remaining <= 0:
+            return None
+        return remaining / self.rate
+
+    def tracked(self):
+        """Trabajos con tamaño sondeado que aún no han terminado"""
+        return len(self.expected)
+
+    def sparkline(self):
+        values = list(self.history)
+        peak = max(values, default=0)
+        if peak <= 0:
+            return ""
+        return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(v / peak * len(SPARK_CHARS)))] for v in values)
+
+class Job:
+    """Registro compacto de un elemento de la cola"""
+    __slots__ = ("id", "url", "custom_name", "resolution", "status", "error",
+                 "progress", "downloaded_bytes", "total_bytes", "speed", "eta", "log_file",
+                 "output_path", "output_size", "checksum")
+
+    def __init__(self, job_id, url, custom_name, resolution, status=JobStatus.QUEUED):
+        self.id = job_id
+        self.url = url
+        self.custom_name = custom_name
+        # Solo hay unos pocos perfiles de resolución: se comparte una única cadena
+        self.resolution = sys.intern(resolution)
+        self.status = status
+        self.error = None
+        self.progress = 0.0
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.speed = 0
+        self.eta = 0
+        self.log_file = None
+        self.output_path = None
+        self.output_size = 0
+        self.checksum = None
+
+    def values(self):
+        """Valores para las columnas del Treeview"""
+        return (self.url, self.custom_name, self.resolution, self.status.label)
+
+    def to_dict(self):
+        data = {
+            "url": self.url,
+            "custom_name": self.custom_name,
+            "resolution": self.resolution,
+            "status": self.status.label
+        }
+        if self.log_file:
+            data["log"] = self.log_file
+        if self.checksum:
+            data.update({"path": self.output_path, "size": self.output_size, "checksum": self.checksum})
+        return data
+
+class JobIndex:
+    """Trabajos indexados por id y por estado, en el orden de la lista.
+
+    Cada trabajo tiene una clave de orden; por estado se guarda una lista
+    ordenada de (clave, id), así que recorrer los trabajos de un estado en el
+    orden de la cola no obliga a recorrer la cola entera.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.by_id = {}
+        self.keys = {}      # id -> clave de orden
+        self.order = []     # (clave, id) de todos los trabajos, ordenado
+        self.by_status = {status: [] for status in JobStatus}
+        self.next_key = 0.0
+
+    def __contains__(self, job_id):
+        return job_id in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, job_id):
+        return self.by_id.get(job_id)
+
+    def add(self, job):
+        """Agrega el trabajo al final de la lista"""
+        with self.lock:
+            self.by_id[job.id] = job
+            self.keys[job.id] = self.next_key
+            self.next_key += 1
+            self._insert(job.id, job.status)
+
+    def remove(self, job_id):
+        with self.lock:
+            job = self.by_id.pop(job_id, None)
+            if job:
+                self._discard(job_id, job.status)
+                del self.keys[job_id]
+            return job
+
+    def set_status(self, job_id, status):
+        with self.lock:
+            job = self.by_id.get(job_id)
+            if job is None:
+                return None
+            self._discard(job_id, job.status, everywhere=False)
+            job.status = status
+            bisect.insort(self.by_status[status], (self.keys[job_id], job_id))
+            return job
+
+    def move(self, job_id, after=None, before=None):
+        """Coloca el trabajo entre sus nuevos vecinos de la lista (None en los extremos)"""
+        with self.lock:
+            job = self.by_id.get(job_id)
+            if job is None or (after is None and before is None):
+                return
+            self._discard(job_id, job.status)
+            low = self.keys[after] if after is not None else self.keys[before] - 1
+            high = self.keys[before] if before is not None else self.keys[after] + 1
+            key = (low + high) / 2
+            if not low < key < high:
+                # Sin hueco entre las claves tras muchos movimientos: se renumera todo
+                self._renumber()
+                low = self.keys[after] if after is not None else -1
+                key = low + 0.5
+            self.keys[job_id] = key
+            self.next_key = max(self.next_key, key + 1)
+            self._insert(job_id, job.status)
+
+    def ordered(self, status=None):
+        """Ids en el orden de la lista, todos o solo los de un estado"""
+        with self.lock:
+            entries = self.order if status is None else self.by_status[status]
+            return [job_id for _, job_id in entries]
+
+    def position(self, job_id):
+        """Posición del trabajo en la lista"""
+        with self.lock:
+            return bisect.bisect_left(self.order, (self.keys[job_id], job_id))
+
+    def with_status(self, status):
+        """Ids con ese estado (copia, sin recorrer el resto de la cola)"""
+        with self.lock:
+            return {job_id for _, job_id in self.by_status[status]}
+
+    def count(self, status):
+        return len(self.by_status[status])
+
+    def _insert(self, job_id, status):
+        entry = (self.keys[job_id], job_id)
+        bisect.insort(self.order, entry)
+        bisect.insort(self.by_status[status], entry)
+
+    def _discard(self, job_id, status, everywhere=True):
+        entry = (self.keys[job_id], job_id)
+        for entries in ((self.order, self.by_status[status]) if everywhere else (self.by_status[status],)):
+            index = bisect.bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+
+    def _renumber(self):
+        self.keys = {job_id: float(n) for n, (_, job_id) in enumerate(self.order)}
+        self.next_key = float(len(self.order))
+        self.order = [(self.keys[job_id], job_id) for _, job_id in self.order]
+        for status, entries in self.by_status.items():
+            self.by_status[status] = [(self.keys[job_id], job_id) for _, job_id in entries]
+
+# Fase de la traza según la etiqueta inicial de cada línea de yt-dlp
+TRACE_TAG_PATTERN = re.compile(r'^\[([A-Za-z0-9_:+-]+)\]')
+TRACE_PHASES = {
+    "download": "descarga",
+    "hlsnative": "descarga",
+    "dashsegments": "descarga",
+    "aria2c": "descarga",
+    "Merger": "unión",
+    "ExtractAudio": "extraer audio",
+}
+
+def trace_phase(line):
+    """Fase que indica una línea de salida de yt-dlp, o None si no tiene etiqueta"""
+    if line.startswith("[#"):
+        # Resumen de progreso de aria2c
+        return "descarga"
+    match = TRACE_TAG_PATTERN.match(line)
+    if not match:
+        return None
+    tag = match.group(1)
+    if tag in TRACE_PHASES:
+        return TRACE_PHASES[tag]
+    if tag.startswith("Fixup"):
+        return "fixup"
+    # Post-procesadores de yt-dlp en mayúscula ([Metadata]); extractores en minúscula ([youtube])
+    return "post-proceso yt-dlp" if tag[0].isupper() else "extracción"
+
+class JobTrace:
+    """Tramos de tiempo de un trabajo: arranque, extracción, descarga, unión, post-proceso"""
+    def __init__(self, label):
+        self.label = label
+        self.spans = []     # (nombre, categoría, inicio, fin) en perf_counter
+        self.current = None
+        self.lock = threading.Lock()
+
+    def begin(self, name, category="fase"):
+        now = time.perf_counter()
+        with self.lock:
+            self._close(now)
+            self.current = (name, category, now)
+
+    def end(self):
+        with self.lock:
+            self._close(time.perf_counter())
+
+    def _close(self, now):
+        if self.current:
+            name, category, start = self.current
+            self.spans.append((name, category, start, now))
+            self.current = None
+
+    def add(self, name, category, start, end):
+        with self.lock:
+            self.spans.append((name, category, start, end))
+
+    def feed(self, line):
+        phase = trace_phase(line)
+        if phase and (self.current is None or self.current[0] != phase):
+            self.begin(phase)
+
+    def summary(self):
+        """Segundos totales por fase"""
+        totals = collections.defaultdict(float)
+        with self.lock:
+            for name, category, start, end in self.spans:
+                if category != "intento":
+                    totals[name] += end - start
+        return dict(totals)
+
+    def events(self, tid):
+        """Eventos en formato Chrome trace (µs desde el arranque del programa)"""
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: (span[2], -span[3]))
+        events = [{"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": self.label}}]
+        for name, category, start, end in spans:
+            events.append({"ph": "X", "name": name, "cat": category, "pid": 1, "tid": tid,
+                           "ts": round((start - STARTUP_T0) * 1e6), "dur": round((end - start) * 1e6)})
+        return events
+
+def chrome_trace(traces):
+    """Documento JSON para chrome://tracing o Perfetto a partir de {id: JobTrace}"""
+    events = []
+    for tid, trace in enumerate(traces.values(), start=1):
+        events.extend(trace.events(tid))
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def kill_process_tree(process):
+    """Mata el proceso y sus hijos (ffmpeg, aria2c...) para que se cierre su salida"""
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            # Lanzado con start_new_session: su pid es el del grupo
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+# Fases de TRACE_PHASES que usan la ventana de la unión; el resto, la de descarga
+STALL_MERGE_PHASES = {"unión", "extraer audio", "fixup", "post-proceso yt-dlp"}
+STALL_PHASE_LABELS = {"download": "descarga", "merge": "unión"}
+
+class StallWatchdog:
+    """Detecta trabajos sin progreso durante la ventana de su fase.
+
+    En la descarga cuenta como progreso que crezcan los bytes (una línea de
+    progreso repetida no); en la unión, cualquier línea o que crezca el archivo
+    de destino, porque ffmpeg no escribe nada mientras trabaja.
+    """
+    def __init__(self, timeouts=None):
+        self.timeouts = dict(STALL_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.jobs = {}      # id -> [fase, último progreso (monotonic), bytes, destino de la unión, tamaño]
+        self.stalled_jobs = {}
+        self.lock = threading.Lock()
+
+    def start(self, job_id):
+        with self.lock:
+            self.jobs[job_id] = ["download", time.monotonic(), 0, None, 0]
+            self.stalled_jobs.pop(job_id, None)
+
+    def feed(self, job_id, line):
+        phase = trace_phase(line)
+        progress = parse_progress(line) if phase == "descarga" else None
+        with self.lock:
+            state = self.jobs.get(job_id)
+            if state is None:
+                return
+            if progress:
+                downloaded = int(progress[1] * progress[0] / 100)
+                if downloaded > state[2]:
+                    state[1], state[2] = time.monotonic(), downloaded
+                return
+            if line.startswith(ARIA2C_SUMMARY_PREFIXES):
+                return
+            state[1] = time.monotonic()
+            if phase:
+                state[0] = "merge" if phase in STALL_MERGE_PHASES else "download"
+            media_path = parse_media_path(line)
+            if media_path:
+                # Archivo nuevo: sus bytes empiezan de cero
+                state[2] = 0
+                if state[0] == "merge":
+                    state[3], state[4] = media_path, 0
+
+    def stalled(self):
+        """[(id, fase, segundos sin progreso)] de los trabajos que superan su ventana.
+
+        Cada trabajo se devuelve una sola vez; finish() indica después si se detuvo por esto.
+        """
+        now = time.monotonic()
+        result = []
+        with self.lock:
+            for job_id, state in list(self.jobs.items()):
+                phase, last, _, merge_path, merge_size = state
+                timeout = self.timeouts.get(phase)
+                if not timeout or now - last < timeout:
+                    continue
+                size = merge_output_size(merge_path) if merge_path else 0
+                if size > merge_size:
+                    state[1], state[4] = now, size
+                    continue
+                del self.jobs[job_id]
+                self.stalled_jobs[job_id] = (phase, now - last)
+                result.append((job_id, phase, now - last))
+        return result
+
+    def finish(self, job_id):
+        """Deja de vigilar el trabajo; devuelve (fase, segundos) si el watchdog lo detuvo"""
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            return self.stalled_jobs.pop(job_id, None)
+
+def merge_output_size(path):
+    """Tamaño del destino de la unión; yt-dlp escribe primero en <nombre>.temp.<ext>"""
+    stem, ext = os.path.splitext(path)
+    size = 0
+    for candidate in (path, f"{stem}.temp{ext}"):
+        try:
+            size = max(size, os.path.getsize(candidate))
+        except OSError:
+            pass
+    return size
+
+class OutputRingBuffer:
+    """Últimas líneas de salida de un trabajo, acotadas en bytes"""
+    def __init__(self, max_bytes=64 * 1024):
+        self.max_bytes = max_bytes
+        self.lines = collections.deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, line):
+        line = line[:self.max_bytes]
+        self.lines.append(line)
+        self.size += len(line) + 1
+        while self.size > self.max_bytes:
+            self.size -= len(self.lines.popleft()) + 1
+            self.dropped += 1
+
+    def text(self):
+        header = f"... {self.dropped} líneas anteriores descartadas ...\n" if self.dropped else ""
+        return header + "\n".join(list(self.lines))
+
+    def spill(self, name):
+        """Guarda el contenido en logs/<name>.log.gz y devuelve la ruta"""
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        path = LOGS_DIR / f"{name}.log.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(self.text() + "\n")
+        # Conservar solo los registros más recientes
+        logs = sorted(LOGS_DIR.glob("*.log.gz"), key=lambda p: p.stat().st_mtime)
+        for old in logs[:-MAX_LOG_FILES]:
+            old.unlink()
+        return path
+
+# Evento NDJSON sin datos que mantiene viva la conexión; los clientes lo reconocen por su tipo
+KEEPALIVE_LINE = json.dumps({"type": "keepalive"})
+
+class EventBus:
+    """Reparte eventos de progreso/estado a los clientes suscritos sin bloquear al emisor"""
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.subscribers = []
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, event):
+        if not self.subscribers:
+            return
+        # Copia: el mismo dict lo comparten todos los suscriptores y quien publica puede reutilizarlo
+        event = dict(event, time=time.time())
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Cliente lento: se descartan eventos antes que frenar las descargas
+                pass
+
+class ControlAPIServer:
+    """API JSON local (localhost o socket Unix) sobre el mismo motor que la interfaz.
+
+    GET    /jobs[?status=En cola]         lista de trabajos
+    POST   /jobs                          {"jobs": [{"url", "custom_name", "resolution"}], "start": true}
+                                          (también acepta NDJSON, una entrada por línea)
+    POST   /jobs/<id>/priority            {"position": "top" | "bottom" | n}
+    POST   /jobs/<id>/cancel  (o DELETE /jobs/<id>)
+    GET    /events[?format=sse]           progreso en NDJSON o server-sent events
+    """
+    def __init__(self, app, config):
+        self.app = app
+        self.config = config
+        self.httpd = None
+
+    def start(self):
+        # La API es opcional: http.server solo se importa al activarla
+        from http.server import ThreadingHTTPServer
+        handler = self._make_handler()
+        socket_path = self.config.get("socket")
+        if socket_path and hasattr(socket, "AF_UNIX"):
+            if os.path.exists(socket_path):
+                # Solo se reemplaza un socket viejo, nunca otro tipo de archivo
+                if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                    raise FileExistsError(f"{socket_path} existe y no es un socket")
+                os.remove(socket_path)
+
+            class UnixHTTPServer(ThreadingHTTPServer):
+                address_family = socket.AF_UNIX
+
+                def server_bind(self):
+                    self.socket.bind(self.server_address)
+                    self.server_name, self.server_port = "localhost", 0
+
+            self.httpd = UnixHTTPServer(socket_path, handler)
+        else:
+            self.httpd = ThreadingHTTPServer((self.config.get("host", "127.0.0.1"), self.config.get("port", 8765)), handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        app = self.app
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def address_string(self):
+                # En socket Unix client_address es una cadena vacía
+                return str(self.client_address[0]) if self.client_address else "unix"
+
+            def send_json(self, code, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_entries(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode("utf-8") if length else ""
+                if "ndjson" in (self.headers.get("Content-Type") or ""):
+                    return [json.loads(line) for line in raw.splitlines() if line.strip()], True, {}
+                data = json.loads(raw or "{}")
+                return data.get("jobs", []), data.get("start", True), data
+
+            def path_parts(self):
+                return [part for part in urlparse(self.path).path.split("/") if part]
+
+            def do_GET(self):
+                parts = self.path_parts()
+                query = parse_qs(urlparse(self.path).query)
+                if parts == ["jobs"]:
+                    status = query.get("status", [None])[0]
+                    try:
+                        self.send_json(200, app.call_in_tk(app.api_list_jobs, status))
+                    except ValueError as e:
+                        self.send_json(400, {"error": str(e)})
+                elif parts == ["events"]:
+                    self.stream_events(query.get("format", ["ndjson"])[0] == "sse")
+                elif parts == ["trace"]:
+                    self.send_json(200, app.call_in_tk(app.export_traces, query.get("id")))
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                parts = self.path_parts()
+                try:
+                    if parts == ["jobs"]:
+                        entries, start = self.read_entries()[:2]
+                        ids = app.call_in_tk(app.api_submit, entries, start)
+                        self.send_json(201, {"ids": ids})
+                    elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "priority":
+                        data = self.read_entries()[2]
+                        index = app.call_in_tk(app.api_reprioritize, parts[1], data.get("position", "top"))
+                        self.send_json(200, {"id": parts[1], "position": index})
+                    elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+                        app.call_in_tk(app.api_cancel, parts[1])
+                        self.send_json(200, {"id": parts[1], "status": "Cancelado"})
+                    else:
+                        self.send_json(404, {"error": "not found"})
+                except KeyError as e:
+                    self.send_json(404, {"error": f"job not found: {e}"})
+                except (ValueError, TypeError) as e:
+                    self.send_json(400, {"error": str(e)})
+
+            def do_DELETE(self):
+                parts = self.path_parts()
+                if len(parts) == 2 and parts[0] == "jobs":
+                    try:
+                        app.call_in_tk(app.api_cancel, parts[1])
+                        self.send_json(200, {"id": parts[1], "status": "Cancelado"})
+                    except KeyError as e:
+                        self.send_json(404, {"error": f"job not found: {e}"})
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+            def stream_events(self, sse):
+                subscriber = app.events.subscribe()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                try:
+                    while True:
+                        try:
+                            event = subscriber.get(timeout=15)
+                            line = json.dumps(event)
+                        except queue.Empty:
+                            # Mantener viva la conexión
+                            line = None
+                        if sse:
+                            chunk = f"data: {line}\n\n" if line else ": keepalive\n\n"
+                        else:
+                            chunk = (line or KEEPALIVE_LINE) + "\n"
+                        self.wfile.write(chunk.encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    app.events.unsubscribe(subscriber)
+
+        return Handler
+
 class YTDownloaderApp:
     def __init__(self, root):
         self.root = root
@@ -104,23 +2255,81 @@ class YTDownloaderApp:
         self.concurrent_fragments = tk.IntVar(value=5)
         self.selected_resolution = tk.StringVar(value="best")
         self.last_update_check = tk.StringVar(value="")
+        self.postprocess_subs = tk.BooleanVar(value=False)
+        self.sub_langs = tk.StringVar(value="es.*")
+        self.move_folder = tk.StringVar(value="")
+        self.rename_pattern = ""
+        self.split_postprocess = tk.BooleanVar(value=True)
+        self.verify_downloads = tk.BooleanVar(value=False)
+        self.dedup_downloads = tk.BooleanVar(value=False)
+        self.ffmpeg_jobs = max(1, (os.cpu_count() or 2) // 2)
+        self.output_targets = []
+        self.api_config = {"enabled": False, "host": "127.0.0.1", "port": 8765, "socket": ""}
+        self.format_profiles = FormatProfiles()
+        # Motor de descarga por host, p. ej. {"example.com": "aria2c"}
+        self.host_downloaders = {}
+        self.default_downloader = "native"
+        self.downloader_args = {}
+        # Cookies/cabeceras por sitio, p. ej. {"example.com": {"cookies_from_browser": "firefox"}}
+        self.auth = AuthProfiles({}, AUTH_DIR)
+        self.subscriptions = SubscriptionScheduler([])
         self.new_version_available = False
+        self.persistence = PersistenceWriter()
+        self.updater = YtDlpUpdateService(RELEASE_CACHE_PATH)
+        self.pending_update = None
         
         # Estado de las descargas
         self.download_queue = queue.Queue()
         self.active_downloads = {}
+        self.job_media = {}
+        self.job_ffmpeg = {}
+        self.postprocessing = set()
+        self.held_jobs = []
+        self.disk = DiskScheduler()
+        self.output_paths = OutputPathIndex()
+        self.stats = QueueStats()
+        self.probe_cache = {}
+        self.verify_retries = {}
+        self.content_index = ContentIndex()
+        self.events = EventBus()
+        self.api_server = None
+        self.job_logs = {}
+        self.job_traces = {}
+        self.jobs = JobIndex()
+        self.watchdog = StallWatchdog()
+        self.stall_requeues = {}
+        # Registros de la cola aún por insertar en la lista (carga por tandas)
+        self.pending_records = None
+        self.save_after_load = False
         
         # Cargar configuración
         self.load_config()
         
-        # Verificar existencia de FFmpeg
-        self.ffmpeg_installed = self.check_ffmpeg_installed()
+        # Post-proceso fuera de los slots de descarga
+        self.pipeline = PostProcessPipeline()
+        self.pipeline.add_stage("ffmpeg", self.pp_ffmpeg, workers=self.ffmpeg_jobs)
+        self.pipeline.add_stage("subtitulos", self.pp_subtitles, workers=2)
+        self.pipeline.add_stage("mux", self.pp_mux, workers=max(1, (os.cpu_count() or 2) // 2))
+        self.pipeline.add_stage("renombrar", self.pp_rename, workers=1)
+        self.pipeline.add_stage("mover", self.pp_move, workers=2)
+        # El pool de esta etapa es también el de hashing: varios archivos a la vez
+        self.pipeline.add_stage("verificar", self.pp_verify, workers=max(2, (os.cpu_count() or 2) // 2))
+        self.pipeline.add_stage("deduplicar", self.pp_dedup, workers=1)
+        
+        # FFmpeg se detecta en segundo plano tras mostrar la ventana
+        self.ffmpeg_installed = False
+        
+        # Ventanas secundarias, creadas la primera vez que se abren
+        self.guide_window = None
+        self.ffmpeg_window = None
         
         # Crear interfaz
         self.create_widgets()
         
-        # Cargar cola guardada
-        self.load_queue()
+        # Cargar cola guardada y detectar FFmpeg cuando la ventana ya esté visible
+        self.root.after_idle(self.load_queue)
+        self.root.after_idle(self.load_content_index)
+        self.root.after_idle(self.detect_ffmpeg_async)
         
         # Configurar cierre
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -130,30 +2339,114 @@ class YTDownloaderApp:
         
         # Verificar actualización cada 7 días
         self.check_update_periodically()
+        
+        # Sincronización periódica de suscripciones
+        self.root.after(SYNC_CHECK_MS, self.run_due_syncs)
+        
+        # Caudal y ETA de la cola en la barra de estado
+        self.root.after(1000, self.refresh_queue_stats)
+        self.root.after(STALL_CHECK_MS, self.check_stalls)
+        
+        # API local de control (opcional)
+        if self.api_config.get("enabled"):
+            self.start_api_server()
+    
+    def start_api_server(self):
+        try:
+            self.api_server = ControlAPIServer(self, self.api_config)
+            self.api_server.start()
+        except OSError as e:
+            print(f"Error starting API: {e}")
+            self.api_server = None
+    
+    def call_in_tk(self, func, *args, timeout=30):
+        """Ejecuta func en el hilo de Tk y espera su resultado (para la API)"""
+        result = queue.Queue(maxsize=1)
+        
+        def run():
+            try:
+                result.put((True, func(*args)))
+            except Exception as e:
+                result.put((False, e))
+        
+        self.root.after(0, run)
+        ok, value = result.get(timeout=timeout)
+        if not ok:
+            raise value
+        return value
+    
+    def api_list_jobs(self, status=None):
+        wanted = None   # None: todos los estados
+        if status is not None:
+            # Estricto: from_label da "En cola" a cualquier texto desconocido
+            matches = [st for st, label in STATUS_LABELS.items() if label == status]
+            if not matches:
+                raise ValueError(f"estado desconocido: {status}")
+            wanted = matches[0]
+        jobs = []
+        for item in self.jobs.ordered(wanted):
+            job = self.jobs.get(item)
+            position = self.jobs.position(item)
+            entry = job.to_dict()
+            entry.update({"id": item, "position": position, "progress": job.progress,
+                          "downloaded_bytes": job.downloaded_bytes, "total_bytes": job.total_bytes})
+            jobs.append(entry)
+        return jobs
+    
+    def api_submit(self, entries, start):
+        ids = []
+        for entry in entries:
+            url = (entry.get("url") or "").strip()
+            if url:
+                ids.append(self.add_job(url, (entry.get("custom_name") or "").strip(),
+                                        entry.get("resolution") or self.selected_resolution.get()))
+        self.status_var.set(f"{len(ids)} descargas agregadas por la API")
+        if start:
+            self.enqueue_pending()
+        self.save_queue()
+        return ids
+    
+    def api_reprioritize(self, item, position):
+        """Mueve un elemento en la lista; "top" también lo adelanta en la cola de descarga"""
+        if item not in self.jobs:
+            raise KeyError(item)
+        if position == "top":
+            self.move_item(item, 0)
+            with self.download_queue.mutex:
+                if item in self.download_queue.queue:
+                    self.download_queue.queue.remove(item)
+                    self.download_queue.queue.appendleft(item)
+        elif position == "bottom":
+            self.move_item(item, "end")
+        else:
+            self.move_item(item, int(position))
+        return self.dl_tree.index(item)
+    
+    def api_cancel(self, item):
+        if item not in self.jobs:
+            raise KeyError(item)
+        self.dl_tree.selection_set(item)
+        self.remove_download()
+        self.events.publish({"type": "status", "id": item, "status": "Cancelado"})
+        return True
     
     def check_ffmpeg_installed(self):
         """Verifica si FFmpeg está instalado en el sistema"""
-        try:
-            # Primero intenta usar la ruta configurada
-            ffmpeg_path = self.ffmpeg_path.get()
-            if ffmpeg_path and os.path.exists(ffmpeg_path):
-                return True
-                
-            # Luego verifica en el PATH del sistema
-            if sys.platform == "win32":
-                check_cmd = "where ffmpeg"
-            else:
-                check_cmd = "which ffmpeg"
-                
-            result = subprocess.run(
-                check_cmd, 
-                shell=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE
-            )
-            return result.returncode == 0
-        except:
-            return False
+        return find_ffmpeg(self.ffmpeg_path.get()) is not None
+    
+    def detect_ffmpeg_async(self):
+        """Detecta FFmpeg en un hilo y actualiza el indicador al terminar"""
+        ffmpeg_path = self.ffmpeg_path.get()
+        
+        def worker():
+            installed = find_ffmpeg(ffmpeg_path) is not None
+            self.root.after(0, self.set_ffmpeg_status, installed)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def set_ffmpeg_status(self, installed):
+        self.ffmpeg_installed = installed
+        self.ffmpeg_status.config(text="FFmpeg: " + ("✓ Instalado" if installed else "✗ No encontrado"))
     
     def setup_keyboard_shortcuts(self):
         # Seleccionar todo
@@ -180,13 +2473,7 @@ class YTDownloaderApp:
     
     def load_config(self):
         default_output = Path.home() / "Downloads"
-        sistema = platform.system()
-        if sistema == "Windows":
-            default_ytdlp = os.path.join(os.getcwd(), "yt-dlp.exe")
-            default_ffmpeg = os.path.join(os.getcwd(), "ffmpeg.exe")
-        else:
-            default_ytdlp = os.path.join(os.getcwd(), "yt-dlp")
-            default_ffmpeg = "/usr/bin/ffmpeg"
+        default_ytdlp, default_ffmpeg = default_tool_paths()
         
         try:
             if CONFIG_PATH.exists():
@@ -201,6 +2488,23 @@ class YTDownloaderApp:
                     self.concurrent_fragments.set(config.get("concurrent_fragments", 5))
                     self.selected_resolution.set(config.get("selected_resolution", "best"))
                     self.last_update_check.set(config.get("last_update_check", ""))
+                    self.postprocess_subs.set(config.get("postprocess_subs", False))
+                    self.verify_downloads.set(config.get("verify_downloads", False))
+                    self.dedup_downloads.set(config.get("dedup_downloads", False))
+                    self.sub_langs.set(config.get("sub_langs", "es.*"))
+                    self.move_folder.set(config.get("move_folder", ""))
+                    self.rename_pattern = config.get("rename_pattern", "")
+                    self.split_postprocess.set(config.get("split_postprocess", True))
+                    self.ffmpeg_jobs = config.get("ffmpeg_jobs", self.ffmpeg_jobs)
+                    self.output_targets = config.get("output_targets", [])
+                    self.api_config.update(config.get("api", {}))
+                    self.format_profiles = FormatProfiles(config.get("format_profiles", []))
+                    self.host_downloaders = config.get("host_downloaders", {})
+                    self.default_downloader = config.get("default_downloader", "native")
+                    self.downloader_args = config.get("downloader_args", {})
+                    self.auth.profiles = config.get("auth_profiles", {})
+                    self.subscriptions = SubscriptionScheduler(config.get("subscriptions", []))
+                    self.watchdog.timeouts.update(config.get("stall_timeouts", {}))
             else:
                 self.ytdlp_path.set(default_ytdlp)
                 self.ffmpeg_path.set(default_ffmpeg)
@@ -227,42 +2531,138 @@ class YTDownloaderApp:
             "retry_attempts": self.retry_attempts.get(),
             "concurrent_fragments": self.concurrent_fragments.get(),
             "selected_resolution": self.selected_resolution.get(),
-            "last_update_check": self.last_update_check.get()
+            "last_update_check": self.last_update_check.get(),
+            "postprocess_subs": self.postprocess_subs.get(),
+            "verify_downloads": self.verify_downloads.get(),
+            "dedup_downloads": self.dedup_downloads.get(),
+            "sub_langs": self.sub_langs.get(),
+            "move_folder": self.move_folder.get(),
+            "rename_pattern": self.rename_pattern,
+            "split_postprocess": self.split_postprocess.get(),
+            "ffmpeg_jobs": self.ffmpeg_jobs,
+            "output_targets": list(self.output_targets),
+            "api": dict(self.api_config),
+            "format_profiles": self.format_profiles.to_config(),
+            "host_downloaders": dict(self.host_downloaders),
+            "default_downloader": self.default_downloader,
+            "downloader_args": dict(self.downloader_args),
+            "auth_profiles": dict(self.auth.profiles),
+            "subscriptions": [dict(sub) for sub in self.subscriptions.subscriptions],
+            "stall_timeouts": dict(self.watchdog.timeouts)
         }
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(config, f)
+        # La escritura se hace en el hilo de persistencia, nunca en el de Tk
+        self.persistence.schedule(CONFIG_PATH, config)
     
     def load_queue(self):
         try:
             if QUEUE_PATH.exists():
-                with open(QUEUE_PATH, "r") as f:
-                    queue_data = json.load(f)
-                
-                for item in queue_data:
-                    self.dl_tree.insert("", "end", values=(
-                        item["url"], 
-                        item["custom_name"], 
-                        item.get("resolution", self.selected_resolution.get()),
-                        item.get("status", "En cola")
-                    ))
+                self.load_records(iter_queue_records(QUEUE_PATH))
         except Exception as e:
             print(f"Error loading queue: {e}")
     
-    def save_queue(self):
-        queue_data = []
+    def insert_job_record(self, item):
+        """Crea un trabajo a partir de un registro de queue.json o de una cola exportada"""
+        status = JobStatus.from_label(item.get("status", "En cola"))
+        # Lo que estaba en curso (aquí o en otro nodo) vuelve a la cola
+        if status in (JobStatus.DOWNLOADING, JobStatus.POSTPROCESSING, JobStatus.WAITING_SPACE):
+            status = JobStatus.QUEUED
+        job = self.insert_job(
+            item["url"],
+            item.get("custom_name") or "Predeterminado",
+            item.get("resolution") or self.selected_resolution.get(),
+            status
+        )
+        job.log_file = item.get("log")
+        if item.get("checksum"):
+            job.output_path, job.output_size, job.checksum = item.get("path"), item.get("size", 0), item["checksum"]
+        return job
+    
+    def load_records(self, records, save=False):
+        """Inserta los registros por tandas entre frames: las primeras filas aparecen enseguida"""
+        self.save_after_load = self.save_after_load or save
+        if self.pending_records is not None:
+            self.pending_records = itertools.chain(self.pending_records, records)
+            return
+        self.pending_records = iter(records)
+        self.load_next_chunk()
+    
+    def load_next_chunk(self):
+        if self.pending_records is None:
+            return
+        loaded = 0
+        try:
+            for record in itertools.islice(self.pending_records, QUEUE_LOAD_CHUNK):
+                loaded += 1
+                try:
+                    self.insert_job_record(record)
+                except (KeyError, TypeError, AttributeError):
+                    print(f"Registro de cola no válido: {record!r}")
+        except (OSError, ValueError) as e:
+            print(f"Error loading queue: {e}")
+            loaded = 0
+        if loaded == QUEUE_LOAD_CHUNK:
+            self.status_var.set(f"Cargando cola... {len(self.jobs)} elementos")
+            self.root.after(1, self.load_next_chunk)
+            return
+        
+        self.pending_records = None
+        self.status_var.set(f"Cola cargada: {len(self.jobs)} elementos")
+        if self.save_after_load:
+            self.save_after_load = False
+            self.save_queue()
+    
+    def load_content_index(self):
+        try:
+            if CONTENT_INDEX_PATH.exists():
+                with open(CONTENT_INDEX_PATH, "r") as f:
+                    self.content_index = ContentIndex(json.load(f))
+        except Exception as e:
+            print(f"Error loading content index: {e}")
+    
+    def queue_records(self):
+        """Registros de la cola en el orden de la lista, incluidos los que aún se están cargando"""
+        records = []
         for item in self.dl_tree.get_children():
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 4:
-                url, custom_name, resolution, status = values
-                queue_data.append({
-                    "url": url,
-                    "custom_name": custom_name,
-                    "resolution": resolution,
-                    "status": status
-                })
-        
-        with open(QUEUE_PATH, "w") as f:
-            json.dump(queue_data, f)
+            job = self.jobs.get(item)
+            if job:
+                records.append(job.to_dict())
+        if self.pending_records is not None:
+            rest = list(self.pending_records)
+            self.pending_records = iter(rest)
+            records.extend(rest)
+        return records
+    
+    def save_queue(self):
+        self.persistence.schedule(QUEUE_PATH, self.queue_records())
+    
+    def export_queue(self):
+        """Exporta cola e historial a NDJSON (opcionalmente .gz) o a un volcado por columnas"""
+        from tkinter import filedialog
+        filepath = filedialog.asksaveasfilename(
+            title="Exportar cola",
+            defaultextension=".ndjson",
+            filetypes=[("NDJSON", "*.ndjson"), ("NDJSON comprimido", "*.ndjson.gz"),
+                       ("Columnas comprimidas", "*" + QUEUE_COLUMNS_SUFFIX), ("JSON", "*.json")]
+        )
+        if filepath:
+            records = self.queue_records()
+            self.persistence.schedule(filepath, records, writer=write_queue_records)
+            self.status_var.set(f"{len(records)} elementos exportados a {filepath}")
+    
+    def import_queue(self):
+        from tkinter import filedialog
+        filepath = filedialog.askopenfilename(
+            title="Importar cola",
+            filetypes=[("Colas exportadas", "*.ndjson *.jsonl *.gz *.json"), ("Todos", "*.*")]
+        )
+        if not filepath:
+            return
+        try:
+            records = iter_queue_records(filepath)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"No se pudo importar la cola:\n{e}")
+            return
+        self.load_records(records, save=True)
     
     def create_widgets(self):
         # Frame de configuración
@@ -303,7 +2703,7 @@ class YTDownloaderApp:
         self.ffmpeg_btn.grid(row=1, column=3, padx=5, pady=2)
         
         # Indicador de estado FFmpeg
-        self.ffmpeg_status = ttk.Label(config_frame, text="FFmpeg: " + ("✓ Instalado" if self.ffmpeg_installed else "✗ No encontrado"))
+        self.ffmpeg_status = ttk.Label(config_frame, text="FFmpeg: comprobando...")
         self.ffmpeg_status.grid(row=1, column=4, columnspan=2, padx=5, pady=2)
         
         # Carpeta destino
@@ -332,6 +2732,16 @@ class YTDownloaderApp:
             width=5
         ).grid(row=3, column=6, sticky="w", padx=5, pady=2)
         
+        # Post-proceso: subtítulos + mux y carpeta final
+        ttk.Checkbutton(config_frame, text="Subtítulos + mux", variable=self.postprocess_subs).grid(row=4, column=0, sticky="w", padx=5, pady=2)
+        ttk.Entry(config_frame, textvariable=self.sub_langs, width=15).grid(row=4, column=1, sticky="w", padx=5, pady=2)
+        ttk.Label(config_frame, text="Mover a:").grid(row=4, column=2, sticky="e", padx=5, pady=2)
+        ttk.Entry(config_frame, textvariable=self.move_folder, width=30).grid(row=4, column=3, columnspan=2, sticky="w", padx=5, pady=2)
+        ttk.Button(config_frame, text="Examinar", command=self.browse_move_folder).grid(row=4, column=5, padx=5, pady=2)
+        ttk.Checkbutton(config_frame, text="FFmpeg aparte", variable=self.split_postprocess).grid(row=4, column=6, sticky="w", padx=5, pady=2)
+        ttk.Checkbutton(config_frame, text="Verificar archivos", variable=self.verify_downloads).grid(row=4, column=7, sticky="w", padx=5, pady=2)
+        ttk.Checkbutton(config_frame, text="Deduplicar", variable=self.dedup_downloads).grid(row=4, column=8, sticky="w", padx=5, pady=2)
+        
         # Frame de nuevas descargas
         new_dl_frame = ttk.LabelFrame(self.root, text="Nueva Descarga")
         new_dl_frame.pack(fill="x", padx=10, pady=5)
@@ -346,19 +2756,10 @@ class YTDownloaderApp:
         
         # Selector de resolución
         ttk.Label(new_dl_frame, text="Resolución:").grid(row=2, column=0, sticky="w", padx=5, pady=2)
-        resolutions = [
-            "Mejor video (default)", 
-            "360p", 
-            "480p", 
-            "720p", 
-            "1080p", 
-            "2160p (4K)", 
-            "Solo audio (mejor calidad)"
-        ]
         resolution_combo = ttk.Combobox(
             new_dl_frame, 
             textvariable=self.selected_resolution, 
-            values=resolutions,
+            values=self.format_profiles.names(),
             state="readonly",
             width=25
         )
@@ -366,6 +2767,7 @@ class YTDownloaderApp:
         resolution_combo.current(0)
         
         ttk.Button(new_dl_frame, text="Agregar a Cola", command=self.add_to_queue).grid(row=2, column=2, padx=5, pady=2)
+        ttk.Button(new_dl_frame, text="Suscribir", command=self.add_subscription).grid(row=2, column=3, padx=5, pady=2)
         
         # Lista de descargas
         dl_frame = ttk.LabelFrame(self.root, text="Cola de Descargas")
@@ -403,6 +2805,8 @@ class YTDownloaderApp:
         # Menú contextual
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="Cambiar URL", command=self.change_url)
+        self.context_menu.add_command(label="Ver registro", command=self.show_job_log)
+        self.context_menu.add_command(label="Exportar traza", command=self.save_traces)
         self.context_menu.add_command(label="Mover arriba", command=self.move_up)
         self.context_menu.add_command(label="Mover abajo", command=self.move_down)
         self.context_menu.add_command(label="Mover al inicio", command=self.move_to_top)
@@ -419,23 +2823,29 @@ class YTDownloaderApp:
         ttk.Button(btn_frame, text="Eliminar", command=self.remove_download).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Limpiar Completadas", command=self.clear_completed).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Seleccionar todo", command=self.select_all).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Exportar cola", command=self.export_queue).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Importar cola", command=self.import_queue).pack(side="left", padx=5)
         
-        # Status bar con fuente en negrita
+        # Status bar con fuente en negrita y, a la derecha, el resumen de la cola
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side="bottom", fill="x")
         self.status_var = tk.StringVar(value="Listo")
         status_bar = ttk.Label(
-            self.root, 
+            status_frame, 
             textvariable=self.status_var, 
             relief="sunken", 
             anchor="w", 
             style='Bold.TLabel'
         )
-        status_bar.pack(side="bottom", fill="x")
+        status_bar.pack(side="left", fill="x", expand=True)
+        self.stats_var = tk.StringVar(value="")
+        ttk.Label(status_frame, textvariable=self.stats_var, relief="sunken", anchor="e").pack(side="right")
     
     def move_item(self, item, new_index):
         """Mueve un elemento a una nueva posición en el Treeview"""
-        values = self.dl_tree.item(item, "values")
-        self.dl_tree.delete(item)
-        self.dl_tree.insert("", new_index, values=values)
+        # move() conserva el identificador del elemento (usado por descargas activas y la API)
+        self.dl_tree.move(item, "", new_index)
+        self.jobs.move(item, after=self.dl_tree.prev(item) or None, before=self.dl_tree.next(item) or None)
     
     def move_up(self):
         """Mueve el elemento seleccionado una posición arriba"""
@@ -484,7 +2894,10 @@ class YTDownloaderApp:
     
     def show_usage_guide(self):
         """Muestra una ventana con la guía de uso"""
-        guide_window = tk.Toplevel(self.root)
+        if self.guide_window is not None and self.guide_window.winfo_exists():
+            self.guide_window.lift()
+            return
+        guide_window = self.guide_window = tk.Toplevel(self.root)
         guide_window.title("Guía de Uso")
         guide_window.geometry("800x600")
         guide_window.transient(self.root)
@@ -613,40 +3026,24 @@ class YTDownloaderApp:
             if datetime.now() - last_date < timedelta(days=7):
                 return
         
-        # Realizar verificación en segundo plano
-        threading.Thread(target=self.check_ytdlp_update, daemon=True).start()
+        # Realizar verificación en segundo plano (las variables de Tk se leen aquí, en el hilo principal)
+        threading.Thread(target=self.check_ytdlp_update, args=(self.ytdlp_path.get(),), daemon=True).start()
     
-    def check_ytdlp_update(self):
+    def check_ytdlp_update(self, ytdlp_path):
         """Verifica si hay una nueva versión de yt-dlp disponible"""
         try:
             self.root.after(0, self.status_var.set, "Verificando actualizaciones...")
-            ytdlp_path = self.ytdlp_path.get()
             
             if not os.path.exists(ytdlp_path):
                 self.root.after(0, self.status_var.set, "yt-dlp no encontrado")
                 return
-                
-            # Obtener versión local
-            local_version = subprocess.check_output(
-                [ytdlp_path, "--version"],
-                stderr=subprocess.STDOUT,
-                text=True
-            ).strip()
             
-            # Obtener última versión disponible
-            try:
-                latest_version = subprocess.check_output(
-                    [ytdlp_path, "-U", "--get-only"],
-                    stderr=subprocess.STDOUT,
-                    text=True
-                ).strip()
-            except subprocess.CalledProcessError:
-                # Usar versión local como fallback
-                latest_version = local_version
-                self.root.after(0, self.status_var.set, "Error al verificar actualización")
+            # Versión local (cacheada) y última publicada (con ETag)
+            local_version = self.updater.local_version(ytdlp_path)
+            latest_version = self.updater.latest_release()["version"]
             
             # Comparar versiones
-            if local_version != latest_version:
+            if parse_version(latest_version) > parse_version(local_version):
                 self.new_version_available = True
                 self.root.after(0, self.update_update_button_style)
                 self.root.after(0, messagebox.showinfo, "Actualización disponible", 
@@ -654,8 +3051,8 @@ class YTDownloaderApp:
                               "Haz clic en 'Actualizar yt-dlp' para instalar la última versión.")
             
             # Actualizar fecha de última verificación
-            self.last_update_check.set(datetime.now().strftime("%Y-%m-%d"))
-            self.save_config()
+            self.root.after(0, self.last_update_check.set, datetime.now().strftime("%Y-%m-%d"))
+            self.root.after(0, self.save_config)
             
         except Exception as e:
             print(f"Error checking update: {e}")
@@ -672,25 +3069,12 @@ class YTDownloaderApp:
     
     def show_download_ytdlp(self):
         """Muestra un diálogo con la URL de descarga de yt-dlp"""
-        sistema = platform.system()
-        arch = platform.machine().lower()
-        
         # Seleccionar URL según sistema operativo
-        if sistema == "Windows":
-            if "arm" in arch or "aarch" in arch:
-                url = "https://github.com/yt-dlp/yt-dlp/releases/latest/download/yt-dlp_win_arm64.exe"
-            else:
-                url = "https://github.com/yt-dlp/yt-dlp/releases/latest/download/yt-dlp.exe"
-        elif sistema == "Linux":
-            if "arm" in arch or "aarch" in arch:
-                url = "https://github.com/yt-dlp/yt-dlp/releases/latest/download/yt-dlp_linux_aarch64"
-            else:
-                url = "https://github.com/yt-dlp/yt-dlp/releases/latest/download/yt-dlp"
-        elif sistema == "Darwin":
-            url = "https://github.com/yt-dlp/yt-dlp/releases/latest/download/yt-dlp_macos"
-        else:
-            messagebox.showerror("Error", f"Sistema operativo no soportado: {sistema}")
+        asset = ytdlp_asset_name()
+        if asset is None:
+            messagebox.showerror("Error", f"Sistema operativo no soportado: {platform.system()}")
             return
+        url = f"https://github.com/yt-dlp/yt-dlp/releases/latest/download/{asset}"
 
         # Crear ventana de diálogo
         dialog = tk.Toplevel(self.root)
@@ -715,13 +3099,16 @@ class YTDownloaderApp:
             self.status_var.set("URL copiada al portapapeles")
         
         ttk.Button(btn_frame, text="Copiar URL", command=copy_url).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="Abrir en navegador", command=lambda: webbrowser.open(url)).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Abrir en navegador", command=lambda: open_in_browser(url)).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Cerrar", command=dialog.destroy).pack(side="left", padx=5)
     
     def show_install_ffmpeg(self):
         """Muestra instrucciones para instalar FFmpeg"""
+        if self.ffmpeg_window is not None and self.ffmpeg_window.winfo_exists():
+            self.ffmpeg_window.lift()
+            return
         sistema = platform.system()
-        dialog = tk.Toplevel(self.root)
+        dialog = self.ffmpeg_window = tk.Toplevel(self.root)
         dialog.title("Instalar FFmpeg")
         dialog.transient(self.root)
         dialog.grab_set()
@@ -776,13 +3163,12 @@ class YTDownloaderApp:
         
         if sistema == "Windows":
             def open_ffmpeg_site():
-                webbrowser.open("https://www.gyan.dev/ffmpeg/builds/")
+                open_in_browser("https://www.gyan.dev/ffmpeg/builds/")
             
             ttk.Button(btn_frame, text="Abrir sitio de descarga", command=open_ffmpeg_site).pack(side="left", padx=5)
         
         def verify_ffmpeg():
-            self.ffmpeg_installed = self.check_ffmpeg_installed()
-            self.ffmpeg_status.config(text="FFmpeg: " + ("✓ Instalado" if self.ffmpeg_installed else "✗ No encontrado"))
+            self.set_ffmpeg_status(self.check_ffmpeg_installed())
             if self.ffmpeg_installed:
                 messagebox.showinfo("Verificación", "FFmpeg encontrado correctamente")
             else:
@@ -794,7 +3180,6 @@ class YTDownloaderApp:
     def update_ytdlp(self):
         """Actualiza yt-dlp a la última versión disponible"""
         try:
-            sistema = platform.system()
             ytdlp_path = self.ytdlp_path.get()
             
             # Verificar si yt-dlp existe
@@ -802,19 +3187,69 @@ class YTDownloaderApp:
                 messagebox.showwarning("Advertencia", "yt-dlp no encontrado. Por favor descárguelo primero.")
                 return
             
-            # Preparar el comando de actualización
-            cmd = [ytdlp_path, "-U"]
-            
-            # Ejecutar en un hilo para no bloquear la GUI
+            # Descargar en un hilo para no bloquear la GUI ni la cola
             threading.Thread(
-                target=self.run_update_command,
-                args=(cmd,),
+                target=self.download_ytdlp_update,
+                args=(ytdlp_path,),
                 daemon=True
             ).start()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al actualizar yt-dlp:\n{str(e)}")
     
+    def download_ytdlp_update(self, ytdlp_path):
+        """Descarga el binario nuevo en segundo plano; la sustitución espera a que no haya descargas"""
+        try:
+            self.root.after(0, self.status_var.set, "Buscando actualización de yt-dlp...")
+            release = self.updater.latest_release()
+            local_version = self.updater.local_version(ytdlp_path)
+            if parse_version(release["version"]) <= parse_version(local_version):
+                self.new_version_available = False
+                self.root.after(0, self.update_update_button_style)
+                self.root.after(0, messagebox.showinfo, "Actualización", f"yt-dlp ya está actualizado ({local_version})")
+                return
+            
+            asset = ytdlp_asset_name()
+            url = release["assets"].get(asset)
+            if not url:
+                # Sin binario publicado para este sistema: usar el actualizador de yt-dlp
+                self.run_update_command([ytdlp_path, "-U"])
+                return
+            
+            def progress(done, total):
+                if total:
+                    self.root.after(0, self.status_var.set, f"Descargando yt-dlp {release['version']}: {done * 100 // total}%")
+            
+            sha256 = self.updater.expected_sha256(release, asset)
+            tmp_path = self.updater.download(url, ytdlp_path, sha256, progress)
+            self.root.after(0, self.queue_ytdlp_install, tmp_path, release["version"])
+        except Exception as e:
+            self.root.after(0, messagebox.showerror, "Error", f"Excepción al actualizar yt-dlp:\n{str(e)}")
+            self.root.after(0, self.status_var.set, "Listo")
+    
+    def queue_ytdlp_install(self, tmp_path, version):
+        self.pending_update = (tmp_path, version)
+        self.install_pending_update()
+    
+    def install_pending_update(self):
+        """Sustituye el binario de yt-dlp si hay una actualización lista y ninguna descarga activa"""
+        if not self.pending_update:
+            return
+        if self.active_downloads:
+            self.status_var.set("Actualización de yt-dlp lista: se instalará al terminar las descargas")
+            return
+        
+        tmp_path, version = self.pending_update
+        self.pending_update = None
+        try:
+            self.updater.install(tmp_path, self.ytdlp_path.get())
+        except OSError as e:
+            messagebox.showerror("Error en actualización", f"No se pudo sustituir yt-dlp:\n{str(e)}")
+            return
+        self.new_version_available = False
+        self.update_update_button_style()
+        self.status_var.set(f"yt-dlp actualizado a {version}")
+    
     def run_update_command(self, cmd):
         """Ejecuta el comando de actualización y muestra el resultado"""
         try:
@@ -860,13 +3295,13 @@ class YTDownloaderApp:
             output = "\n".join(output_lines)
             
             if returncode == 0:
-                messagebox.showinfo("Actualización completada", 
-                                   f"yt-dlp se ha actualizado correctamente:\n\n{output}")
+                self.root.after(0, messagebox.showinfo, "Actualización completada", 
+                                f"yt-dlp se ha actualizado correctamente:\n\n{output}")
                 self.new_version_available = False
                 self.root.after(0, self.update_update_button_style)
             else:
-                messagebox.showerror("Error en actualización", 
-                                    f"Error al actualizar yt-dlp (código {returncode}):\n\n{output}")
+                self.root.after(0, messagebox.showerror, "Error en actualización", 
+                                f"Error al actualizar yt-dlp (código {returncode}):\n\n{output}")
                 
         except Exception as e:
             self.root.after(0, messagebox.showerror, "Error", f"Excepción al actualizar yt-dlp:\n{str(e)}")
@@ -880,6 +3315,7 @@ class YTDownloaderApp:
         else:
             filetypes = [("Ejecutable", "*"), ("Todos los archivos", "*.*")]
             
+        from tkinter import filedialog
         filepath = filedialog.askopenfilename(
             title="Seleccionar yt-dlp",
             filetypes=filetypes
@@ -894,6 +3330,7 @@ class YTDownloaderApp:
         else:
             filetypes = [("Ejecutable", "*"), ("Todos los archivos", "*.*")]
             
+        from tkinter import filedialog
         filepath = filedialog.askopenfilename(
             title="Seleccionar FFmpeg",
             filetypes=filetypes
@@ -901,14 +3338,20 @@ class YTDownloaderApp:
         if filepath:
             self.ffmpeg_path.set(filepath)
             # Verificar si el nuevo path es válido
-            self.ffmpeg_installed = self.check_ffmpeg_installed()
-            self.ffmpeg_status.config(text="FFmpeg: " + ("✓ Instalado" if self.ffmpeg_installed else "✗ No encontrado"))
+            self.set_ffmpeg_status(self.check_ffmpeg_installed())
     
     def browse_output(self):
+        from tkinter import filedialog
         folder = filedialog.askdirectory(title="Seleccionar Carpeta Destino")
         if folder:
             self.output_folder.set(folder)
     
+    def browse_move_folder(self):
+        from tkinter import filedialog
+        folder = filedialog.askdirectory(title="Seleccionar carpeta final")
+        if folder:
+            self.move_folder.set(folder)
+    
     def add_to_queue(self):
         url = self.url_entry.get().strip()
         name = self.custom_name.get().strip()
@@ -919,7 +3362,7 @@ class YTDownloaderApp:
             return
             
         # Verificar si es descarga de audio y si FFmpeg está disponible
-        if "audio" in resolution.lower() and not self.ffmpeg_installed:
+        if self.format_profiles.audio_only(resolution) and not self.ffmpeg_installed:
             if not messagebox.askyesno(
                 "FFmpeg requerido", 
                 "Para descargar solo audio se necesita FFmpeg. ¿Desea continuar igualmente?\n"
@@ -927,17 +3370,97 @@ class YTDownloaderApp:
             ):
                 return
             
-        self.dl_tree.insert("", "end", values=(
-            url, 
-            name if name else "Predeterminado", 
-            resolution,
-            "En cola"
-        ))
+        self.add_job(url, name, resolution)
         self.url_entry.delete(0, "end")
         self.custom_name.delete(0, "end")
         self.status_var.set(f"Descarga agregada a cola: {url}")
         self.save_config()  # Guardar la resolución seleccionada
     
+    def add_subscription(self):
+        """Sincroniza periódicamente el canal de la URL con la resolución elegida"""
+        url = self.url_entry.get().strip()
+        if not url:
+            messagebox.showerror("Error", "Debe ingresar la URL del canal o lista")
+            return
+        
+        from tkinter import simpledialog
+        hours = simpledialog.askinteger(
+            "Suscribir", 
+            "Buscar novedades cada (horas):", 
+            initialvalue=6, minvalue=1, maxvalue=24 * 30
+        )
+        if not hours:
+            return
+        
+        self.subscriptions.add(url, hours, self.selected_resolution.get())
+        self.url_entry.delete(0, "end")
+        self.status_var.set(f"Suscripción agregada: {url} (cada {hours} h)")
+        self.save_config()
+    
+    def run_due_syncs(self):
+        """Lanza las sincronizaciones pendientes y vuelve a programarse"""
+        ytdlp_path = self.ytdlp_path.get()
+        for sub in self.subscriptions.due(time.time()):
+            threading.Thread(target=self.sync_subscription, args=(sub, ytdlp_path), daemon=True).start()
+        self.root.after(SYNC_CHECK_MS, self.run_due_syncs)
+    
+    def sync_subscription(self, sub, ytdlp_path):
+        """Busca entradas nuevas del canal (en segundo plano) y las pasa a la cola"""
+        SUBSCRIPTIONS_DIR.mkdir(parents=True, exist_ok=True)
+        archive_path = SUBSCRIPTIONS_DIR / f"{sub['id']}.archive"
+        date_after = None
+        if sub.get("last_sync"):
+            # Un día de margen por las zonas horarias de las fechas de subida
+            date_after = (datetime.fromtimestamp(sub["last_sync"]) - timedelta(days=1)).strftime("%Y%m%d")
+        auth_args, auth_files = self.auth.job_args(sub["url"], ytdlp_path)
+        try:
+            entries = fetch_new_entries(ytdlp_path, sub["url"], archive_path, date_after,
+                                        sub.get("max_items", 20), auth_args)
+            if entries:
+                with open(archive_path, "a", encoding="utf-8") as f:
+                    f.writelines(f"{key}\n" for key, _ in entries)
+            error = None
+        except (OSError, subprocess.TimeoutExpired, RuntimeError) as e:
+            entries, error = [], str(e)
+        finally:
+            self.auth.release(auth_files)
+        self.root.after(0, self.finish_sync, sub, entries, error)
+    
+    def finish_sync(self, sub, entries, error):
+        self.subscriptions.finished(sub, time.time(), error is None)
+        if error:
+            self.status_var.set(f"Error al sincronizar {sub['url']}: {error}")
+        elif entries:
+            # De la más antigua a la más nueva; solo se lanzan las novedades
+            for _, url in reversed(entries):
+                self.download_queue.put(self.add_job(url, "", sub.get("resolution", DEFAULT_PROFILE)))
+            self.status_var.set(f"{len(entries)} novedades de {sub['url']}")
+            self.launch_downloaders()
+            self.save_queue()
+        self.save_config()
+    
+    def add_job(self, url, name, resolution):
+        """Agrega un elemento a la cola y devuelve su identificador"""
+        job = self.insert_job(url, name if name else "Predeterminado", resolution)
+        self.events.publish({"type": "status", "id": job.id, "status": job.status.label})
+        return job.id
+    
+    def insert_job(self, url, custom_name, resolution, status=JobStatus.QUEUED):
+        """Crea el registro del trabajo y su fila en la lista (comparten el id)"""
+        job = Job(None, url, custom_name, resolution, status)
+        job.id = self.dl_tree.insert("", "end", values=job.values())
+        self.jobs.add(job)
+        return job
+    
+    def delete_job(self, item):
+        self.jobs.remove(item)
+        self.job_traces.pop(item, None)
+        self.probe_cache.pop(item, None)
+        self.stall_requeues.pop(item, None)
+        self.stats.finish(item)
+        if self.dl_tree.exists(item):
+            self.dl_tree.delete(item)
+    
     def show_context_menu(self, event):
         item = self.dl_tree.identify_row(event.y)
         if item:
@@ -950,37 +3473,32 @@ class YTDownloaderApp:
             return
             
         item = selected[0]
-        values = self.dl_tree.item(item, "values")
-        if not values or len(values) < 4:
+        job = self.jobs.get(item)
+        if job is None:
             return
-            
-        current_url = values[0]
-        custom_name = values[1]
-        resolution = values[2]
-        status = values[3]
         
+        from tkinter import simpledialog
         new_url = simpledialog.askstring(
             "Cambiar URL", 
             "Ingrese la nueva URL:", 
-            initialvalue=current_url
+            initialvalue=job.url
         )
         
         if new_url and new_url.strip():
-            self.dl_tree.item(item, values=(new_url.strip(), custom_name, resolution, status))
+            job.url = new_url.strip()
+            self.dl_tree.item(item, values=job.values())
             self.status_var.set("URL actualizada")
     
     def start_downloads(self):
-        if not self.dl_tree.get_children():
+        if not len(self.jobs):
             messagebox.showinfo("Información", "La cola de descargas está vacía")
             return
             
         # Verificar FFmpeg para descargas de audio
-        audio_downloads = False
-        for item in self.dl_tree.get_children():
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 3 and "audio" in values[2].lower():
-                audio_downloads = True
-                break
+        audio_downloads = any(
+            self.format_profiles.audio_only(self.jobs.get(item).resolution)
+            for item in self.jobs.with_status(JobStatus.QUEUED)
+        )
                 
         if audio_downloads and not self.ffmpeg_installed:
             if not messagebox.askyesno(
@@ -990,16 +3508,24 @@ class YTDownloaderApp:
             ):
                 return
             
-        # Agregar solo elementos en cola
-        for item in self.dl_tree.get_children():
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 4 and values[3] == "En cola":
+        self.enqueue_pending()
+    
+    def enqueue_pending(self):
+        """Pasa a la cola de descarga los elementos "En cola" y lanza los slots libres"""
+        pending = self.jobs.with_status(JobStatus.QUEUED) - set(self.download_queue.queue)
+        if not pending:
+            self.launch_downloaders()
+            return
+        # Agregar solo elementos en cola, en el orden de la lista
+        for item in self.jobs.ordered(JobStatus.QUEUED):
+            if item in pending:
                 self.download_queue.put(item)
         
         self.launch_downloaders()
     
     def launch_downloaders(self):
-        max_dl = min(self.max_simultaneous.get(), self.download_queue.qsize())
+        free_slots = self.max_simultaneous.get() - len(self.active_downloads)
+        max_dl = min(free_slots, self.download_queue.qsize())
         
         for _ in range(max_dl):
             if not self.download_queue.empty():
@@ -1008,59 +3534,22 @@ class YTDownloaderApp:
     
     def start_single_download(self, item):
         # Verificar si el elemento aún existe
-        if not self.dl_tree.exists(item):
-            return
-            
-        values = self.dl_tree.item(item, "values")
-        if not values or len(values) < 4:
+        job = self.jobs.get(item)
+        if job is None:
             return
             
-        url, custom_name, resolution, _ = values
-        self.dl_tree.item(item, values=(url, custom_name, resolution, "Descargando"))
-        
-        output_path = self.output_folder.get()
-        cmd = [
-            self.ytdlp_path.get(),
-            url,
-            "-o",
-            os.path.join(output_path, f"{custom_name}.%(ext)s") if custom_name != "Predeterminado" else os.path.join(output_path, "%(title)s.%(ext)s"),
-            "--newline"
-        ]
+        url, custom_name, resolution = job.url, job.custom_name, job.resolution
+        self.set_status(item, JobStatus.DOWNLOADING)
         
-        # Añadir parámetros de fragmentos concurrentes
-        cmd.extend(['--concurrent-fragments', str(self.concurrent_fragments.get())])
-        
-        # Añadir FFmpeg si está configurado
-        ffmpeg_path = self.ffmpeg_path.get()
-        if ffmpeg_path and os.path.exists(ffmpeg_path):
-            cmd.extend(['--ffmpeg-location', os.path.dirname(ffmpeg_path)])
-        
-        # Manejar selección de resolución
-        if resolution == "Solo audio (mejor calidad)":
-            cmd.extend(['-f', 'bestaudio', '-x'])
-        elif resolution != "Mejor video (default)":
-            # Extraer el número de la resolución (ej: "720p" -> 720)
-            try:
-                height = int(re.search(r'\d+', resolution).group())
-            except:
-                height = 720
-            
-            # Definir resoluciones en orden ascendente
-            resolutions = [360, 480, 720, 1080, 1440, 2160]
-            # Filtrar resoluciones >= a la seleccionada
-            valid_res = [r for r in resolutions if r >= height]
-            # Crear cadena de formato para yt-dlp
-            format_parts = []
-            for r in valid_res:
-                format_parts.append(f'bestvideo[height={r}]+bestaudio')
-                format_parts.append(f'best[height={r}]')
-            format_parts.append('best')
-            format_str = '/'.join(format_parts)
-            cmd.extend(['-f', format_str])
+        # Con FFmpeg disponible, la unión/extracción se hace en la cola de FFmpeg
+        # y el slot de descarga se libera en cuanto los bytes están en disco
+        split = self.split_postprocess.get() and self.ffmpeg_installed
+        format_args, ffmpeg_mode = self.format_profiles.args(resolution, split)
+        self.job_ffmpeg[item] = ffmpeg_mode
         
         thread = threading.Thread(
-            target=self.run_download_with_retries,
-            args=(cmd, item, self.retry_attempts.get()),
+            target=self.run_download_job,
+            args=(item, url, custom_name, resolution, format_args, split, self.retry_attempts.get()),
             daemon=True
         )
         thread.start()
@@ -1068,55 +3557,219 @@ class YTDownloaderApp:
         # Guardar referencia al proceso
         self.active_downloads[item] = (thread, None)
     
+    def command_settings(self):
+        """Instantánea de la configuración que necesita build_download_command"""
+        return {
+            "ytdlp_path": self.ytdlp_path.get(),
+            "ffmpeg_path": self.ffmpeg_path.get(),
+            "concurrent_fragments": self.concurrent_fragments.get(),
+            "postprocess_subs": self.postprocess_subs.get(),
+            "sub_langs": self.sub_langs.get(),
+            "host_downloaders": self.host_downloaders,
+            "default_downloader": self.default_downloader,
+            "downloader_args": self.downloader_args,
+        }
+    
+    def build_download_cmd(self, url, custom_name, resolution, format_args, split, output_path, auth_args=()):
+        return build_download_command(self.command_settings(), url, custom_name,
+                                      self.format_profiles.audio_only(resolution),
+                                      format_args, split, output_path, auth_args=auth_args)
+    
+    def probe(self, item, url, custom_name, format_args, auth_args=()):
+        """Estima el tamaño (None si no se conoce), el nombre de salida sin extensión y el id del video.
+
+        El resultado se guarda por trabajo: un trabajo retenido no vuelve a sondear.
+        """
+        cache_key = (url, custom_name, tuple(format_args))
+        cached = self.probe_cache.get(item)
+        if cached and cached[0] == cache_key:
+            return cached[1:]
+        
+        base_name = custom_name if custom_name != "Predeterminado" else "%(title)s"
+        args = [arg for arg in format_args if arg != '-x'] + list(auth_args)
+        try:
+            result = subprocess.run(
+                [self.ytdlp_path.get(), url, "--skip-download", "--no-warnings",
+                 "-o", f"{base_name}.%(ext)s",
+                 "--print", "size:%(filesize,filesize_approx|0)s",
+                 "--print", "name:%(filename)s",
+                 "--print", "id:%(extractor_key)s %(id)s"] + args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=120
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None, None, None
+        sizes, names, ids = [], [], []
+        for line in result.stdout.splitlines():
+            if line.startswith("size:") and line[5:].isdigit():
+                sizes.append(int(line[5:]))
+            elif line.startswith("name:"):
+                names.append(os.path.splitext(os.path.basename(line[5:]))[0])
+            elif line.startswith("id:"):
+                ids.append(line[3:].lower())
+        size = sum(sizes) if sizes and any(sizes) else None
+        # Nombre e id solo valen si la URL es una única entrada: en listas y canales
+        # cada entrada conserva su propio nombre y una entrada ya descargada no
+        # permite saltarse el resto
+        single = len(names) <= 1 and len(ids) <= 1
+        stem = (names[0] or None) if single and names else None
+        media_id = ids[0] if single and ids else None
+        if result.returncode == 0:
+            self.probe_cache[item] = (cache_key, size, stem, media_id)
+        return size, stem, media_id
+    
+    def output_folders(self):
+        return [self.output_folder.get()] + [f for f in self.output_targets if f]
+    
+    def run_download_job(self, item, url, custom_name, resolution, format_args, split, max_retries):
+        """Admite el trabajo según el espacio libre y lanza la descarga"""
+        self.root.after(0, self.status_var.set, f"Estimando tamaño: {url}")
+        auth_files = []
+        try:
+            try:
+                # Las cookies del sitio se preparan una vez y sirven para el sondeo y todos los reintentos
+                auth_args, auth_files = self.auth.job_args(url, self.ytdlp_path.get())
+                size, stem, media_id = self.probe(item, url, custom_name, format_args, auth_args)
+                existing = self.content_index.find_id(media_id) if self.dedup_downloads.get() else None
+                if existing:
+                    # Mismo video ya descargado (otra URL o un espejo): no se vuelve a bajar
+                    self.update_status(item, f"Ya descargado: {existing}")
+                    self.complete_download(item, 0)
+                    return
+                if size:
+                    self.stats.expect(item, size)
+                # Al separar formatos, partes y resultado coexisten hasta la unión
+                if size and split:
+                    size *= 2
+                folder = self.disk.admit(item, size, self.output_folders())
+                if folder is None:
+                    self.hold_job(item)
+                    return
+                
+                if stem:
+                    # Nombre ya expandido por yt-dlp; si otro trabajo lo tiene, se usa "nombre (N)".
+                    # El sufijo se añade a la plantilla, no al nombre expandido
+                    resolved = self.output_paths.claim(item, folder, stem)
+                    if resolved != stem:
+                        self.update_status(item, f"Nombre de salida en uso, se guardará como: {resolved}")
+                        base_name = custom_name if custom_name != "Predeterminado" else "%(title)s"
+                        custom_name = base_name + resolved[len(stem):]
+                
+                cmd = self.build_download_cmd(url, custom_name, resolution, format_args, split, folder, auth_args)
+            except Exception as e:
+                # Sin esto la fila se quedaría descargando con el slot ocupado
+                self.root.after(0, self.status_var.set, f"Error: {str(e)}")
+                self.complete_download(item, -1, f"Error al preparar la descarga: {e}")
+                return
+            self.run_download_with_retries(cmd, item, max_retries)
+        finally:
+            self.auth.release(auth_files)
+    
+    def hold_job(self, item):
+        """Retiene un trabajo sin espacio y libera su slot para el siguiente"""
+        self.disk.release(item)
+        self.stats.finish(item)
+        self.job_media.pop(item, None)
+        self.active_downloads.pop(item, None)
+        self.held_jobs.append(item)
+        self.root.after(0, self.set_status, item, JobStatus.WAITING_SPACE)
+        self.root.after(0, self.status_var.set, "Espacio insuficiente: descarga retenida")
+        
+        if not self.download_queue.empty():
+            next_item = self.download_queue.get()
+            self.start_single_download(next_item)
+        elif not self.active_downloads and not self.postprocessing:
+            # Nada liberará espacio por sí solo: reintentar más tarde
+            self.root.after(30000, self.retry_held_jobs)
+    
+    def release_disk(self, item):
+        if self.disk.release(item) and self.held_jobs:
+            self.root.after(0, self.retry_held_jobs)
+    
+    def retry_held_jobs(self):
+        """Vuelve a intentar los trabajos retenidos por falta de espacio"""
+        held, self.held_jobs = self.held_jobs, []
+        for item in held:
+            if item in self.jobs:
+                self.download_queue.put(item)
+        free_slots = self.max_simultaneous.get() - len(self.active_downloads)
+        for _ in range(max(0, free_slots)):
+            if self.download_queue.empty():
+                break
+            self.start_single_download(self.download_queue.get())
+    
     def run_download_with_retries(self, cmd, item, max_retries):
         """Ejecuta la descarga con reintentos"""
         attempts = 0
         success = False
+        job = self.jobs.get(item)
+        trace = self.job_traces[item] = JobTrace(job.url if job else item)
         
         while attempts <= max_retries and not success:
             attempts += 1
+            attempt_start = time.perf_counter()
+            # Hasta la primera línea con etiqueta, el tiempo es de arranque del proceso
+            trace.begin("arranque")
             try:
                 sistema = platform.system()
                 if sistema != "Windows":
                     # Convertir a comando de shell para mejor compatibilidad
                     cmd_str = " ".join(shlex.quote(arg) for arg in cmd)
+                    # Sesión propia: el watchdog mata shell, yt-dlp y ffmpeg de una vez
                     process = subprocess.Popen(
                         cmd_str,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
-                        text=True,
-                        encoding="utf-8",
-                        bufsize=1,
-                        universal_newlines=True,
-                        shell=True
+                        bufsize=0,
+                        shell=True,
+                        start_new_session=True
                     )
                 else:
                     process = subprocess.Popen(
                         cmd,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
-                        text=True,
-                        encoding="utf-8",
-                        bufsize=1,
-                        universal_newlines=True
+                        bufsize=0
                     )
                 
                 # Actualizar referencia al proceso
                 self.active_downloads[item] = (threading.current_thread(), process)
+                self.watchdog.start(item)
                 
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        # Mostrar progreso en negrita
-                        self.update_status(item, output.strip())
+                # Salida en binario y por bloques: solo se decodifican líneas completas
+                for line in iter_lines(process.stdout):
+                    trace.feed(line)
+                    self.watchdog.feed(item, line)
+                    media_path = parse_media_path(line)
+                    if media_path:
+                        self.stats.new_file(item, media_path)
+                        self.disk.new_file(item, media_path)
+                        parts = self.job_media.setdefault(item, [])
+                        if media_path not in parts:
+                            parts.append(media_path)
+                    # Mostrar progreso en negrita
+                    self.update_status(item, line)
                 
-                returncode = process.returncode
+                returncode = process.wait()
+                stall = self.watchdog.finish(item)
+                trace.end()
+                trace.add(f"intento {attempts}", "intento", attempt_start, time.perf_counter())
                 
                 if returncode == 0:
                     success = True
                     self.complete_download(item, returncode)
+                elif stall:
+                    # Lo detuvo el watchdog: al final de la cola, sin ocupar el slot
+                    self.requeue_stalled(item, *stall)
+                    return
+                elif not self.disk.has_headroom(item):
+                    # Disco lleno: reintentar no sirve, se retiene hasta que haya sitio
+                    self.hold_job(item)
+                    return
                 else:
                     # Si no es el último intento, esperar 3 segundos
                     if attempts <= max_retries:
@@ -1126,57 +3779,429 @@ class YTDownloaderApp:
                         self.complete_download(item, returncode)
             
             except Exception as e:
+                self.watchdog.finish(item)
+                trace.end()
+                trace.add(f"intento {attempts}", "intento", attempt_start, time.perf_counter())
                 # Si no es el último intento, esperar 3 segundos
                 if attempts <= max_retries:
                     self.update_status(item, f"Error: {str(e)}. Reintentando en 3 segundos... (intento {attempts}/{max_retries})")
                     time.sleep(3)
                 else:
-                    self.root.after(0, self.dl_tree.item, item, "values", 
-                                  (self.dl_tree.item(item, "values")[0], 
-                                   self.dl_tree.item(item, "values")[1],
-                                   self.dl_tree.item(item, "values")[2],
-                                   f"Error: {str(e)}"))
+                    self.root.after(0, self.set_status, item, JobStatus.FAILED, str(e))
                     self.root.after(0, self.status_var.set, f"Error: {str(e)}")
                     self.complete_download(item, -1)
     
+    def check_stalls(self):
+        """Mata los yt-dlp sin progreso; run_download_with_retries los vuelve a encolar"""
+        for item, phase, idle in self.watchdog.stalled():
+            _, process = self.active_downloads.get(item, (None, None))
+            if process:
+                self.update_status(item, f"Sin progreso durante {format_duration(idle)} ({STALL_PHASE_LABELS[phase]}): se detiene")
+                kill_process_tree(process)
+        self.root.after(STALL_CHECK_MS, self.check_stalls)
+    
+    def requeue_stalled(self, item, phase, idle):
+        """Devuelve al final de la cola un trabajo detenido por el watchdog y libera su slot"""
+        message = f"Sin progreso durante {format_duration(idle)} ({STALL_PHASE_LABELS[phase]})"
+        count = self.stall_requeues[item] = self.stall_requeues.get(item, 0) + 1
+        if count > self.retry_attempts.get():
+            self.complete_download(item, -1, message)
+            return
+        self.update_status(item, f"{message}: se vuelve a encolar ({count}/{self.retry_attempts.get()})")
+        self.release_disk(item)
+        self.stats.finish(item)
+        self.job_media.pop(item, None)
+        self.job_ffmpeg.pop(item, None)
+        self.active_downloads.pop(item, None)
+        self.download_queue.put(item)
+        self.root.after(0, self.set_status, item, JobStatus.QUEUED)
+        self.root.after(0, self.launch_downloaders)
+    
     def update_status(self, item, message):
+        # Toda la salida queda en el buffer del trabajo para diagnosticar fallos
+        log = self.job_logs.get(item)
+        if log is None:
+            log = self.job_logs[item] = OutputRingBuffer()
+        log.append(message)
+        
         # Filtrar mensajes de progreso para mostrar solo los importantes
         if "ETA" in message or "of" in message or "%" in message:
             self.root.after(0, self.status_var.set, message)
+            event = {"type": "progress", "id": item, "line": message}
+            
+            progress = parse_progress(message)
+            job = self.jobs.get(item)
+            if progress and job:
+                job.progress, job.total_bytes, job.speed, job.eta = progress
+                job.downloaded_bytes = int(job.total_bytes * job.progress / 100)
+                self.stats.progress(item, job.downloaded_bytes)
+                self.disk.written(item, job.downloaded_bytes)
+                event.update({"progress": job.progress, "downloaded_bytes": job.downloaded_bytes,
+                              "total_bytes": job.total_bytes, "speed": job.speed, "eta": job.eta})
+            self.events.publish(event)
     
-    def complete_download(self, item, returncode):
-        # Verificar si el elemento aún existe
-        if not self.dl_tree.exists(item):
+    def refresh_queue_stats(self):
+        """Tick de un segundo: caudal total, ETA de la cola y contadores (O(1))"""
+        rate = self.stats.tick()
+        active = self.jobs.count(JobStatus.DOWNLOADING)
+        queued = self.jobs.count(JobStatus.QUEUED) + self.jobs.count(JobStatus.WAITING_SPACE)
+        failed = self.jobs.count(JobStatus.FAILED)
+        
+        text = f"{format_size(rate)}/s"
+        eta = self.stats.eta(max(0, active + queued - self.stats.tracked()))
+        if eta is not None:
+            text += f" · ETA {format_duration(eta)}"
+        text += f" · activas {active + self.jobs.count(JobStatus.POSTPROCESSING)} · en cola {queued}"
+        if failed:
+            text += f" · fallidas {failed}"
+        self.stats_var.set(f"{text} {self.stats.sparkline()}")
+        self.root.after(1000, self.refresh_queue_stats)
+    
+    def set_status(self, item, status, error=None):
+        """Cambia el estado de un elemento de la cola y lo notifica a la API"""
+        job = self.jobs.set_status(item, status)
+        if job is None:
             return
-            
-        values = self.dl_tree.item(item, "values")
-        if not values or len(values) < 4:
+        job.error = error
+        if self.dl_tree.exists(item):
+            self.dl_tree.item(item, values=job.values())
+        event = {"type": "status", "id": item, "status": status.label}
+        if error:
+            event["error"] = error
+        self.events.publish(event)
+    
+    def complete_download(self, item, returncode, error=None):
+        # Verificar si el elemento aún existe
+        job_record = self.jobs.get(item)
+        if job_record is None:
             return
+        self.stall_requeues.pop(item, None)
             
-        url, custom_name, resolution, _ = values
+        url, custom_name = job_record.url, job_record.custom_name
+        parts = self.job_media.pop(item, [])
+        ffmpeg_mode = self.job_ffmpeg.pop(item, None)
+        self.stats.finish(item)
+        if not (returncode == 0 and parts and (ffmpeg_mode or self.postprocess_enabled())):
+            self.release_disk(item)
         
-        if returncode == 0:
-            status = "Completado"
-            self.root.after(0, self.status_var.set, f"Descarga completada: {custom_name or url}")
-            
-            # Eliminar automáticamente si está habilitado
-            if self.auto_remove.get():
-                self.root.after(0, self.dl_tree.delete, item)
-            else:
-                self.root.after(0, self.dl_tree.item, item, "values", (url, custom_name, resolution, status))
+        if returncode == 0 and parts and (ffmpeg_mode or self.postprocess_enabled()):
+            # La descarga terminó: el post-proceso sigue sin ocupar el slot
+            self.postprocessing.add(item)
+            self.root.after(0, self.set_status, item, JobStatus.POSTPROCESSING)
+            job = {
+                "item": item,
+                "path": parts[-1],
+                "parts": parts,
+                "ffmpeg": ffmpeg_mode,
+                "ffmpeg_bin": self.ffmpeg_binary(),
+                "subs": [],
+                "mux": self.postprocess_subs.get(),
+                "rename_pattern": self.rename_pattern,
+                "move_folder": self.move_folder.get(),
+                "verify": self.verify_downloads.get(),
+                "expect_video": not self.format_profiles.audio_only(job_record.resolution),
+                "dedup": self.dedup_downloads.get(),
+                "media_id": (self.probe_cache.get(item) or (None,) * 4)[3],
+            }
+            self.pipeline.submit(
+                job,
+                on_done=lambda job, error: self.root.after(0, self.finish_postprocess, job, error),
+                on_stage=lambda job, stage: self.root.after(0, self.status_var.set, f"{stage}: {os.path.basename(job['path'])}"),
+                on_span=self.record_stage_span
+            )
+        elif returncode == 0:
+            self.job_logs.pop(item, None)
+            self.root.after(0, self.mark_completed, item, custom_name or url)
         else:
-            status = "Fallido"
-            self.root.after(0, self.dl_tree.item, item, "values", (url, custom_name, resolution, status))
+            self.root.after(0, self.set_status, item, JobStatus.FAILED, error or f"código de salida {returncode}")
+            self.spill_job_log(item)
         
         # Eliminar de activos
         if item in self.active_downloads:
             del self.active_downloads[item]
+        if self.pending_update and not self.active_downloads:
+            self.root.after(0, self.install_pending_update)
         
         # Iniciar siguiente descarga
         if not self.download_queue.empty():
             next_item = self.download_queue.get()
             self.start_single_download(next_item)
     
+    def mark_completed(self, item, label):
+        """Marca un elemento como completado (o lo elimina si está habilitado)"""
+        if item not in self.jobs:
+            return
+        self.status_var.set(f"Descarga completada: {label}")
+        
+        self.set_status(item, JobStatus.COMPLETED)
+        
+        # Eliminar automáticamente si está habilitado
+        if self.auto_remove.get():
+            self.delete_job(item)
+    
+    def postprocess_enabled(self):
+        return bool(self.postprocess_subs.get() or self.move_folder.get() or self.rename_pattern
+                    or self.verify_downloads.get() or self.dedup_downloads.get())
+    
+    def finish_postprocess(self, job, error):
+        item = job["item"]
+        self.postprocessing.discard(item)
+        self.release_disk(item)
+        if item not in self.jobs:
+            return
+        record = self.jobs.get(item)
+        if error and job.get("corrupt") and self.verify_retries.get(item, 0) < self.retry_attempts.get():
+            # Archivo dañado: se vuelve a descargar en lugar de darlo por completado
+            self.verify_retries[item] = self.verify_retries.get(item, 0) + 1
+            self.update_status(item, f"Verificación fallida, se descarga de nuevo: {error}")
+            self.probe_cache.pop(item, None)
+            self.set_status(item, JobStatus.QUEUED)
+            self.download_queue.put(item)
+            self.launch_downloaders()
+        elif error:
+            self.update_status(item, f"Error en post-proceso: {error}")
+            self.spill_job_log(item)
+            self.set_status(item, JobStatus.FAILED, error)
+            self.status_var.set(f"Error en post-proceso: {error}")
+        else:
+            if job.get("deduplicated"):
+                self.update_status(item, f"Contenido repetido, enlazado a: {job['deduplicated']}")
+            if job["dedup"]:
+                self.persistence.schedule(CONTENT_INDEX_PATH, self.content_index.entries())
+            verified = job.get("verified")
+            if verified:
+                record.output_path = job["path"]
+                record.output_size = verified["size"]
+                record.checksum = verified["checksum"]
+                self.events.publish({"type": "verified", "id": item, "path": job["path"], **verified})
+            self.verify_retries.pop(item, None)
+            self.job_logs.pop(item, None)
+            self.mark_completed(item, os.path.basename(job["path"]))
+    
+    def record_stage_span(self, job, stage, start, end):
+        trace = self.job_traces.get(job["item"])
+        if trace:
+            trace.add(stage, "post-proceso", start, end)
+    
+    def export_traces(self, items=None):
+        """Traza Chrome de los trabajos indicados (o de todos)"""
+        traces = self.job_traces if not items else {
+            item: self.job_traces[item] for item in items if item in self.job_traces}
+        return chrome_trace(traces)
+    
+    def save_traces(self):
+        """Guarda la traza de los elementos seleccionados (o de todos) para chrome://tracing"""
+        if not self.job_traces:
+            messagebox.showinfo("Información", "Todavía no hay trazas de descargas")
+            return
+        from tkinter import filedialog
+        filepath = filedialog.asksaveasfilename(
+            title="Exportar traza",
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json")]
+        )
+        if filepath:
+            self.persistence.schedule(filepath, self.export_traces(self.dl_tree.selection()))
+            self.status_var.set(f"Traza exportada: {filepath}")
+    
+    def spill_job_log(self, item):
+        """Vuelca a disco (comprimido) la salida de un trabajo fallido y libera el buffer"""
+        log = self.job_logs.pop(item, None)
+        if log is None:
+            return
+        try:
+            name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{item}"
+            job = self.jobs.get(item)
+            path = str(log.spill(name))
+            if job:
+                job.log_file = path
+        except OSError as e:
+            print(f"Error saving log: {e}")
+    
+    def show_job_log(self):
+        """Muestra la salida registrada del elemento seleccionado"""
+        selected = self.dl_tree.selection()
+        if not selected:
+            return
+        item = selected[0]
+        job = self.jobs.get(item)
+        if job is None:
+            return
+        
+        if item in self.job_logs:
+            text = self.job_logs[item].text()
+        elif job.log_file and os.path.exists(job.log_file):
+            with gzip.open(job.log_file, "rt", encoding="utf-8") as f:
+                text = f.read()
+        else:
+            messagebox.showinfo("Registro", "No hay registro para este elemento")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Registro - {job.url}")
+        dialog.geometry("900x500")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        text_widget = tk.Text(frame, wrap="none", bg="#444444", fg="#CCCCCC", insertbackground="#FFFFFF")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+        text_widget.insert("1.0", text)
+        text_widget.see("end")
+        text_widget.configure(state="disabled")
+        text_widget.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        ttk.Button(dialog, text="Cerrar", command=dialog.destroy).pack(pady=5)
+    
+    def ffmpeg_binary(self):
+        ffmpeg_path = self.ffmpeg_path.get()
+        if ffmpeg_path and os.path.exists(ffmpeg_path):
+            return ffmpeg_path
+        return shutil.which("ffmpeg") or "ffmpeg"
+    
+    def run_ffmpeg(self, ffmpeg, args, output_file):
+        """Ejecuta FFmpeg hacia un temporal y lo renombra al terminar"""
+        stem, ext = os.path.splitext(output_file)
+        tmp_file = f"{stem}.ffmpeg-tmp{ext}"
+        result = subprocess.run(
+            [ffmpeg, "-y", "-v", "error"] + args + [tmp_file],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if result.returncode != 0:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            lines = result.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"ffmpeg código {result.returncode}")
+        os.replace(tmp_file, output_file)
+    
+    def pp_ffmpeg(self, job):
+        """Etapa 0: une video+audio o extrae el audio, fuera del slot de descarga"""
+        mode = job["ffmpeg"]
+        if not mode:
+            return job
+        parts = job["parts"]
+        
+        if mode == "merge" and len(parts) >= 2:
+            video, audio = parts[0], parts[1]
+            # mp4+m4a se une en mp4 nativo; el resto en mkv
+            if video.endswith(".mp4") and audio.endswith(".m4a"):
+                ext = ".mp4"
+            else:
+                ext = ".mkv"
+            output_file = os.path.splitext(strip_format_suffix(video))[0] + ext
+            self.run_ffmpeg(job["ffmpeg_bin"],
+                            ["-i", video, "-i", audio, "-map", "0:v:0", "-map", "1:a:0", "-c", "copy"],
+                            output_file)
+            for part in parts:
+                if os.path.abspath(part) != os.path.abspath(output_file):
+                    os.remove(part)
+        elif mode == "extract":
+            source = parts[-1]
+            source_ext = os.path.splitext(source)[1].lower()
+            ext = AUDIO_CONTAINERS.get(source_ext, ".mka")
+            if ext is None:
+                output_file = strip_format_suffix(source)
+                os.replace(source, output_file)
+            else:
+                output_file = os.path.splitext(strip_format_suffix(source))[0] + ext
+                self.run_ffmpeg(job["ffmpeg_bin"], ["-i", source, "-vn", "-c:a", "copy"], output_file)
+                os.remove(source)
+        else:
+            # Un solo archivo (formato combinado): basta con quitar el sufijo
+            output_file = strip_format_suffix(parts[-1])
+            os.replace(parts[-1], output_file)
+        
+        job["path"] = output_file
+        return job
+    
+    def pp_subtitles(self, job):
+        """Etapa 1: localiza los subtítulos que yt-dlp escribió junto al archivo"""
+        if job["mux"]:
+            job["subs"] = find_subtitle_sidecars(job["path"])
+        return job
+    
+    def pp_mux(self, job):
+        """Etapa 2: integra los subtítulos con el mux de subs.py"""
+        if not job["subs"]:
+            return job
+        subs = load_subs_module()
+        if subs is None:
+            raise RuntimeError("subs.py no encontrado")
+        
+        input_file = job["path"]
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        # todos los idiomas descargados en una sola pasada de mkvmerge
+        tracks = [subs.sidecar_track(path, stem) for path in job["subs"]]
+        output_file = os.path.splitext(input_file)[0] + ".mkv"
+        if not subs.has_free_space(os.path.dirname(output_file) or ".", subs.required_space(input_file, *job["subs"])):
+            raise RuntimeError("espacio insuficiente para el mux")
+        try:
+            subs.mux(input_file, tracks, output_file)
+        except subs.MuxError as e:
+            raise RuntimeError(f"mkvmerge: {e}") from e
+        
+        for path in job["subs"]:
+            os.remove(path)
+        if os.path.abspath(input_file) != os.path.abspath(output_file):
+            os.remove(input_file)
+        job["path"] = output_file
+        return job
+    
+    def pp_rename(self, job):
+        """Etapa 3: renombra según el patrón configurado ({name}, {ext}, {date})"""
+        pattern = job["rename_pattern"]
+        if not pattern:
+            return job
+        directory, filename = os.path.split(job["path"])
+        stem, ext = os.path.splitext(filename)
+        new_name = pattern.format(name=stem, ext=ext.lstrip("."), date=datetime.now().strftime("%Y-%m-%d")) + ext
+        new_path = os.path.join(directory, new_name)
+        if new_path != job["path"] and not os.path.exists(new_path):
+            os.replace(job["path"], new_path)
+            job["path"] = new_path
+        return job
+    
+    def pp_move(self, job):
+        """Etapa 4: mueve el resultado a la carpeta final"""
+        folder = job["move_folder"]
+        if not folder:
+            return job
+        os.makedirs(folder, exist_ok=True)
+        job["path"] = shutil.move(job["path"], os.path.join(folder, os.path.basename(job["path"])))
+        return job
+    
+    def pp_verify(self, job):
+        """Etapa 5: comprueba con ffprobe que el resultado es legible y calcula su hash"""
+        if not job["verify"]:
+            return job
+        try:
+            job["verified"] = verify_media(job["path"], find_ffprobe(job["ffmpeg_bin"]), job["expect_video"])
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise RuntimeError(f"no se pudo verificar: {e}")
+        except RuntimeError as e:
+            # Archivo dañado: se borra para que el reintento lo descargue de nuevo
+            job["corrupt"] = True
+            if os.path.exists(job["path"]):
+                os.remove(job["path"])
+            raise
+        return job
+    
+    def pp_dedup(self, job):
+        """Etapa 6: si el contenido ya estaba guardado, lo sustituye por un enlace al existente"""
+        if not job["dedup"]:
+            return job
+        size = os.path.getsize(job["path"])
+        checksum = (job.get("verified") or {}).get("checksum")
+        existing, checksum = self.content_index.find_duplicate(job["path"], size, checksum)
+        if existing and link_duplicate(existing, job["path"]):
+            job["deduplicated"] = existing
+        self.content_index.add(job["path"], size, checksum, job["media_id"])
+        return job
+    
     def remove_download(self):
         selected = self.dl_tree.selection()
         if not selected:
@@ -1185,40 +4210,35 @@ class YTDownloaderApp:
         # Eliminar todos los elementos seleccionados
         for item in selected:
             # Verificar si el elemento existe antes de intentar acceder
-            if not self.dl_tree.exists(item):
+            job = self.jobs.get(item)
+            if job is None:
                 continue
                 
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 4:
-                status = values[3]
-                
-                # Si está descargando, detener el proceso
-                if status == "Descargando" and item in self.active_downloads:
-                    _, process = self.active_downloads[item]
-                    if process:
-                        try:
-                            process.terminate()
-                        except:
-                            pass
-                    del self.active_downloads[item]
+            # Si está descargando, detener el proceso
+            if job.status == JobStatus.DOWNLOADING and item in self.active_downloads:
+                _, process = self.active_downloads[item]
+                if process:
+                    try:
+                        process.terminate()
+                    except:
+                        pass
+                del self.active_downloads[item]
             
-            self.dl_tree.delete(item)
+            self.release_disk(item)
+            self.job_logs.pop(item, None)
+            if item in self.held_jobs:
+                self.held_jobs.remove(item)
+            self.delete_job(item)
     
     def clear_completed(self):
-        for item in self.dl_tree.get_children():
-            # Verificar si el elemento existe
-            if not self.dl_tree.exists(item):
-                continue
-                
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 4 and values[3] == "Completado":
-                self.dl_tree.delete(item)
+        for item in self.jobs.with_status(JobStatus.COMPLETED):
+            self.delete_job(item)
     
     def on_close(self):
         # Cambiar estado de descargas activas a "En cola"
         for item, (_, process) in list(self.active_downloads.items()):
             # Verificar si el elemento existe
-            if not self.dl_tree.exists(item):
+            if item not in self.jobs:
                 continue
                 
             # Detener proceso si existe
@@ -1228,12 +4248,15 @@ class YTDownloaderApp:
                 except:
                     pass
             
-            # Actualizar estado en la lista
-            values = self.dl_tree.item(item, "values")
-            if values and len(values) >= 4:
-                url, custom_name, resolution, _ = values
-                # Cambiar estado a "En cola" para continuar después
-                self.dl_tree.item(item, values=(url, custom_name, resolution, "En cola"))
+            # Cambiar estado a "En cola" para continuar después
+            self.jobs.set_status(item, JobStatus.QUEUED)
+        
+        # Los que estaban en post-proceso o retenidos se vuelven a encolar
+        for item in list(self.postprocessing) + self.held_jobs:
+            self.jobs.set_status(item, JobStatus.QUEUED)
+        self.pipeline.shutdown()
+        if self.api_server:
+            self.api_server.stop()
         
         # Limpiar lista de descargas activas
         self.active_downloads.clear()
@@ -1241,9 +4264,169 @@ class YTDownloaderApp:
         # Guardar configuración y cola
         self.save_config()
         self.save_queue()
+        self.persistence.stop()
         self.root.destroy()
 
-if __name__ == "__main__":
+def run_startup_benchmark(runs):
+    """Lanza el programa varias veces con --bench-startup-once y resume los tiempos"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), "--bench-startup-once"],
+            text=True
+        )
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    
+    for key in ("imports_ms", "init_ms", "first_frame_ms", "ffmpeg_ms"):
+        values = sorted(sample[key] for sample in samples if sample.get(key) is not None)
+        if values:
+            median = values[len(values) // 2]
+            print(f"{key:>15}: mediana {median:8.1f} ms  min {values[0]:8.1f}  max {values[-1]:8.1f}")
+
+def run_downloader_benchmark(argv):
+    """Descarga la misma URL con cada motor y compara el caudal (--bench-downloaders URL...)"""
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description="Compara motores de descarga")
+    parser.add_argument("--bench-downloaders", nargs="+", metavar="URL", required=True)
+    parser.add_argument("--backends", default=",".join(DOWNLOADER_BACKENDS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--resolution", default=DEFAULT_PROFILE)
+    args = parser.parse_args(argv)
+    
+    settings = load_headless_settings()
+    settings["postprocess_subs"] = False
+    profiles = FormatProfiles(settings["format_profiles"])
+    format_args, _ = profiles.args(args.resolution, False)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in backends if b not in DOWNLOADER_BACKENDS]
+    if unknown:
+        parser.error(f"motores desconocidos: {', '.join(unknown)}")
+    
+    for url in args.bench_downloaders:
+        print(url)
+        for backend in backends:
+            rates = []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    cmd = build_download_command(settings, url, "bench", profiles.audio_only(args.resolution),
+                                                 format_args, False, tmp_dir, downloader=backend)
+                    start = time.perf_counter()
+                    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    elapsed = time.perf_counter() - start
+                    size = sum(f.stat().st_size for f in Path(tmp_dir).iterdir() if f.is_file())
+                if result.returncode == 0 and size:
+                    rates.append(size / elapsed / 1024 ** 2)
+            if rates:
+                rates.sort()
+                print(f"{backend:>10}: mediana {rates[len(rates) // 2]:7.2f} MiB/s  "
+                      f"min {rates[0]:7.2f}  max {rates[-1]:7.2f}  ({len(rates)}/{args.runs} ok)")
+            else:
+                print(f"{backend:>10}: sin descargas correctas")
+
+def bench_startup_once():
+    """Mide importaciones, construcción y primer frame; imprime JSON y sale"""
+    load_tk()
+    imports_done = time.perf_counter()
+    root = tk.Tk()
+    app = YTDownloaderApp(root)
+    init_done = time.perf_counter()
+    timings = {
+        "imports_ms": (imports_done - STARTUP_T0) * 1000,
+        "init_ms": (init_done - imports_done) * 1000,
+    }
+    
+    def first_frame():
+        root.update_idletasks()
+        timings["first_frame_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        wait_ffmpeg()
+    
+    def wait_ffmpeg():
+        # La detección termina cuando el indicador deja de decir "comprobando"
+        if "comprobando" in app.ffmpeg_status.cget("text"):
+            root.after(5, wait_ffmpeg)
+            return
+        timings["ffmpeg_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        print(json.dumps(timings))
+        root.destroy()
+    
+    root.after_idle(first_frame)
+    root.mainloop()
+
+def run_gui():
+    load_tk()
     root = tk.Tk()
     app = YTDownloaderApp(root)
     root.mainloop()
+
+def run_profiled(main, stats_path):
+    """Ejecuta main con cProfile y tracemalloc; guarda el perfil y resume lo más costoso"""
+    import cProfile
+    import pstats
+    import tracemalloc
+    tracemalloc.start(10)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        main()
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        profiler.dump_stats(stats_path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        print("Mayores asignaciones de memoria:")
+        for stat in snapshot.statistics("lineno")[:15]:
+            print(f"  {stat}")
+        tracemalloc.stop()
+        print(f"Perfil guardado en {stats_path} (abrir con python -m pstats)")
+
+def run_worker_cli(argv):
+    """Modo nodo: --worker --store DIR [--slots N] [--node NOMBRE] [--lease SEG]
+    Encolar: --store DIR --submit URL... [--resolution R] | --import-queue [queue.json|.ndjson[.gz]|.columns.json.gz]
+    Exportar: --store DIR --export-queue ARCHIVO (NDJSON, .gz o por columnas según la extensión)"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Nodo de descarga sin interfaz")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--store", required=True, help="carpeta compartida de trabajos")
+    parser.add_argument("--slots", type=int)
+    parser.add_argument("--node")
+    parser.add_argument("--lease", type=int, default=60)
+    parser.add_argument("--submit", nargs="+", metavar="URL")
+    parser.add_argument("--resolution", default=DEFAULT_PROFILE)
+    parser.add_argument("--import-queue", nargs="?", const=str(QUEUE_PATH), metavar="QUEUE_FILE")
+    parser.add_argument("--export-queue", metavar="FILE")
+    args = parser.parse_args(argv)
+
+    store = SharedJobStore(args.store, lease_seconds=args.lease)
+    if args.submit:
+        for url in args.submit:
+            print(store.submit(url, resolution=args.resolution))
+    if args.import_queue:
+        for entry in iter_queue_records(args.import_queue):
+            if entry.get("status", "En cola") == "En cola":
+                store.submit(entry["url"], entry.get("custom_name", "Predeterminado"),
+                             entry.get("resolution", DEFAULT_PROFILE))
+    if args.export_queue:
+        # Los trabajos del almacén se leen de uno en uno; NDJSON los escribe sin acumularlos
+        write_queue_records(args.export_queue, store.jobs())
+    if args.worker:
+        WorkerNode(store, load_headless_settings(), slots=args.slots, node=args.node).run()
+
+if __name__ == "__main__":
+    if "--store" in sys.argv:
+        run_worker_cli(sys.argv[1:])
+    elif "--bench-downloaders" in sys.argv:
+        run_downloader_benchmark(sys.argv[1:])
+    elif "--bench-startup-once" in sys.argv:
+        bench_startup_once()
+    elif "--bench-startup" in sys.argv:
+        index = sys.argv.index("--bench-startup")
+        runs = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 5
+        run_startup_benchmark(runs)
+    elif "--profile" in sys.argv:
+        # Opcional: --profile [archivo.pstats]
+        index = sys.argv.index("--profile")
+        stats_path = sys.argv[index + 1] if len(sys.argv) > index + 1 else str(APP_DATA_DIR / "profile.pstats")
+        run_profiled(run_gui, stats_path)
+    else:
+        run_gui()